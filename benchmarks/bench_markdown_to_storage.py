@@ -0,0 +1,54 @@
+"""Throughput of the Markdown -> Confluence storage converter on large issue tables.
+
+    python benchmarks/bench_markdown_to_storage.py --rows 1000 5000 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exporters.confluence_exporter import markdown_to_storage
+from formatters.issue_index import IssueIndex
+from formatters.markdown_formatter import format_markdown
+
+def make_issues(count, seed=0):
+    rng = random.Random(seed)
+    words = "fix update pipeline runner gitlab argo deploy namespace cluster RHACS image scan & <config> **urgent**".split()
+    return [{
+        "key": f"CICD-{i}",
+        "fields": {
+            "issuetype": {"name": rng.choice(["Bug", "Story", "Task", "Improvement"])},
+            "priority": {"name": rng.choice(["Blocker", "Critical", "Major", "Minor", "Trivial"])},
+            "status": {"name": rng.choice(["Done", "To Do", "In Progress", "Backlog"])},
+            "summary": " ".join(rng.choice(words) for _ in range(rng.randint(5, 20))),
+        },
+    } for i in range(count)]
+
+def bench(func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark markdown_to_storage.")
+    parser.add_argument("--rows", nargs="+", type=int, default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'KB':>7} {'parse ms':>9} {'rows/s':>10} {'MB/s':>6}")
+    for rows in args.rows:
+        index = IssueIndex.from_issues(make_issues(rows))
+        summaries = {"Bug": "Fixed a number of pipeline issues.", "Story": "New runner features."}
+        markdown = format_markdown("bench-1.0", {}, summaries, index)
+        parsed = bench(markdown_to_storage, markdown, repeat=args.repeat)
+        size_mb = len(markdown.encode("utf-8")) / 1e6
+        print(f"{rows:>7} {size_mb * 1000:>7.0f} {parsed * 1000:>9.1f} {rows / parsed:>10.0f} {size_mb / parsed:>6.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare the local summarizer backends on latency, memory and output similarity.
+
+Each backend runs in its own process so peak RSS is measured in isolation.
+
+    python benchmarks/bench_summarizers.py --runs 5
+    python benchmarks/bench_summarizers.py --text-file output/release_notes_Test-release-0.1.0.markdown
+"""
+import argparse
+import difflib
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_TEXT_FILE = "output/release_notes_Test-release-0.1.0.markdown"
+
+BACKENDS = ["huggingface", "onnx-fp32", "onnx-int8"]
+
+def build_backend(name):
+    # Imported here so each spawned process only loads the runtime it measures.
+    if name == "huggingface":
+        from summarizers.huggingface_summarizer import HuggingFaceSummarizer
+        return HuggingFaceSummarizer()
+    from summarizers.onnx_summarizer import OnnxSummarizer
+    return OnnxSummarizer(quantize=name == "onnx-int8")
+
+def load_text(path):
+    """Use the issue summaries from a generated Markdown file as summarizer input."""
+    with open(path) as f:
+        rows = [line.split("|") for line in f if line.startswith("| ") and "Key" not in line]
+    return " ".join(f"{row[3].strip()}." for row in rows if len(row) > 4)
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def run_backend(name, text, runs, queue):
+    try:
+        started = time.perf_counter()
+        summarizer = build_backend(name)
+        load_s = time.perf_counter() - started
+        summarizer.summarize(text)  # warm-up
+        latencies = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            output = summarizer.summarize(text)
+            latencies.append(time.perf_counter() - started)
+        queue.put({"name": name, "load_s": load_s, "latencies": latencies, "rss_mb": peak_rss_mb(), "output": output})
+    except Exception as e:
+        queue.put({"name": name, "error": str(e)})
+
+def similarity(a, b):
+    ratio = difflib.SequenceMatcher(None, a, b).ratio()
+    words_a, words_b = set(a.lower().split()), set(b.lower().split())
+    jaccard = len(words_a & words_b) / len(words_a | words_b) if words_a | words_b else 1.0
+    return ratio, jaccard
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local summarizer backends.")
+    parser.add_argument("--text-file", default=DEFAULT_TEXT_FILE, help="Generated release notes to take input text from")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per backend")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    args = parser.parse_args()
+
+    text = load_text(args.text_file)
+    print(f"Input: {len(text.split())} words from {args.text_file}\n")
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for name in args.backends:
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_backend, args=(name, text, args.runs, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    baseline = next((r["output"] for r in results if "output" in r), "")
+    print(f"{'backend':<12} {'load s':>8} {'median s':>9} {'min s':>7} {'peak MB':>8} {'seq sim':>8} {'word sim':>9}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['name']:<12} failed: {r['error']}")
+            continue
+        ratio, jaccard = similarity(baseline, r["output"])
+        print(f"{r['name']:<12} {r['load_s']:>8.2f} {statistics.median(r['latencies']):>9.3f} {min(r['latencies']):>7.3f} "
+              f"{r['rss_mb']:>8.0f} {ratio:>8.2f} {jaccard:>9.2f}")
+
+if __name__ == "__main__":
+    main()
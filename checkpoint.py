@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+SECRET_KEYS = {"password", "api_token", "openai_api_key"}
+
+def config_hash(cfg):
+    """Stable hash of the run config; credentials are left out so rotating a token keeps checkpoints valid."""
+    def strip(value):
+        if isinstance(value, dict):
+            return {k: strip(v) for k, v in value.items() if k not in SECRET_KEYS}
+        if isinstance(value, list):
+            return [strip(v) for v in value]
+        return value
+    payload = json.dumps(strip(cfg), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+class RunCheckpoint:
+    """Stage-level checkpoints of one generate_release_notes run, stored under output/.checkpoints/<config hash>/.
+
+    Stages are saved as JSON: "issues" (fetched issues), "summaries" (per-category
+    summaries, saved after each category) and "outputs" (sinks that completed).
+    Rendered documents are kept next to them under rendered/.
+    """
+
+    def __init__(self, cfg, root="output/.checkpoints"):
+        self.run_id = config_hash(cfg)
+        self.dir = os.path.join(root, self.run_id)
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _write(self, name, text):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A unique temp file per write, so concurrent writers never replace each other's file.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, stage):
+        try:
+            with open(self._path(f"{stage}.json"), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, stage, data):
+        self._write(f"{stage}.json", json.dumps(data))
+
+    def load_rendered(self, fmt):
+        try:
+            with open(self._path(os.path.join("rendered", fmt)), "r") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save_rendered(self, fmt, content):
+        self._write(os.path.join("rendered", fmt), content)
+
+    def clear(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
@@ -1,14 +1,17 @@
 import argparse
 import sys
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from fetchers.jira_fetcher import fetch_jira_issues
-from summarizers.huggingface_summarizer import HuggingFaceSummarizer
-from summarizers.openai_summarizer import OpenAISummarizer
-from summarizers.ollama_summarizer import OllamaSummarizer
-from formatters.markdown_formatter import format_markdown
-from formatters.json_formatter import format_json
-from formatters.html_formatter import format_html
-from exporters.file_exporter import export_to_file
-from exporters.confluence_exporter import export_to_confluence
+from summarizers.summary_cache import SummaryCache
+from formatters.issue_index import IssueIndex
+from exporters.dispatcher import dispatch_outputs
+from clusterers.issue_clusterer import deduplicate_issues
+from checkpoint import RunCheckpoint
+from profiling import PROFILE_MODES, RunProfiler
+from run_plan import FORMATTERS, RunPlan
+from snapshot import Snapshot, snapshot_path, write_snapshot
 
 def categorize_issues(issues):
     """Categorize Jira issues by type."""
@@ -36,113 +39,250 @@ def extract_adf_text(adf_content):
         return ""
     return parse_node(adf_content).strip()
 
-def generate_release_notes(cfg):
-    if "jira" not in cfg or not all(k in cfg["jira"] for k in ["url", "username", "password"]):
-        raise Exception("Missing required 'jira' config fields: url, username, password")
-    jira_url = cfg["jira"]["url"]
-    auth = (cfg["jira"]["username"], cfg["jira"]["password"])
+def generate_release_notes(cfg, resume=False, summarizer=None, progress=None, version=None, jql=None):
+    """Fetch, summarize and publish release notes for one config or compiled RunPlan.
 
-    if "version" not in cfg:
+    Long-lived callers compile a RunPlan once and pass it with only `version`
+    and `jql` varying per call; a plain config dict is compiled on the spot.
+    `summarizer` overrides the plan's shared instance;
+    `progress(stage, fraction, message)` is called as the fetch, summarize and
+    output stages advance. Returns the run's version, categories, summaries,
+    IssueIndex and completed outputs.
+    """
+    plan = cfg if isinstance(cfg, RunPlan) else RunPlan(cfg)
+    progress = progress or (lambda stage, fraction, message: None)
+    version = plan.version if version is None else version
+    if version is None:
         raise Exception("Missing 'version' in config")
-    version = cfg["version"]
+    jql_to_use, jql_without_version = plan.queries(version, jql)
 
-    if "summarizer" not in cfg or "type" not in cfg["summarizer"]:
-        raise Exception("Missing 'summarizer' or 'type' in config")
-    summarizer_type = cfg["summarizer"]["type"]
+    checkpoint = RunCheckpoint(plan.run_config(version, jql))
+    if resume:
+        print(f"Resuming run {checkpoint.run_id} from {checkpoint.dir}")
+    else:
+        checkpoint.clear()
 
-    if "output" not in cfg:
-        raise Exception("Missing 'output' in config")
-    output_config = cfg["output"]
-    format = output_config.get("format", "markdown")
+    progress("fetch", 0.0, "Fetching issues from Jira")
+    issues = checkpoint.load("issues") if resume else None
+    if issues:
+        print(f"✅ Loaded {len(issues)} issues from checkpoint")
+    else:
+        try:
+            print(f"Fetching issues with JQL: {jql_to_use}")
+            issues = fetch_jira_issues(plan.jira_url, jql_to_use, plan.auth, plan.shard_size, plan.fetch_workers)
+        except Exception as e:
+            print(f"⚠️ Failed initial fetch: {str(e)}")
+            issues = None
 
-    default_project = "CICD"
-    issue_types = "issuetype IN (\"Story\", \"New Functionality\", \"Improvement\", \"Task\", \"Bug\")"
-    jql_with_version = f"project = {default_project} AND fixVersion = \"{version}\" AND {issue_types}"
-    jql_without_version = f"project = {default_project} AND {issue_types}"
-    jql_to_use = cfg["jira"].get("jql", jql_with_version)
+        if not issues:
+            print(f"Falling back to broader query: {jql_without_version}")
+            try:
+                issues = fetch_jira_issues(plan.jira_url, jql_without_version, plan.auth, plan.shard_size, plan.fetch_workers)
+            except Exception as e:
+                raise Exception(f"Failed to fetch fallback Jira issues: {str(e)}")
 
-    try:
-        print(f"Fetching issues with JQL: {jql_to_use}")
-        issues = fetch_jira_issues(jira_url, jql_to_use, auth)
-    except Exception as e:
-        print(f"⚠️ Failed initial fetch: {str(e)}")
-        issues = None
+        if not issues:
+            print("⚠️ No issues found with either query. Exiting...")
+            return
+        checkpoint.save("issues", issues)
+
+    progress("fetch", 1.0, f"Fetched {len(issues)} issues")
+    categories = categorize_issues(issues)
+    index = IssueIndex.from_issues(issues)
+    summaries = (checkpoint.load("summaries") or {}) if resume else {}
+    if summaries:
+        print(f"✅ Loaded summaries for {', '.join(summaries)} from checkpoint")
+    pending = [category for category in categories if category not in summaries]
+    # Rendered documents and finished outputs are only reusable when no summary changes in this run.
+    reuse_outputs = resume and not pending
+    failed = []
+
+    summary_cache = SummaryCache(plan.cache_path) if plan.reuse else None
+    cache_scope = plan.cache_scope(version)
 
-    if not issues:
-        print(f"Falling back to broader query: {jql_without_version}")
+    def issue_text(issue):
+        desc = issue["fields"].get("description", "")
+        desc = extract_adf_text(desc) if isinstance(desc, dict) else desc or ""
+        return f"{issue['fields']['summary']}: {desc}"
+
+    def current_summarizer():
+        nonlocal summarizer
+        if summarizer is None:
+            summarizer = plan.summarizer()
+        return summarizer
+
+    def condense(issue):
+        """Summarize one long issue for the summary cache; a failure falls back to its full text."""
+        text = issue_text(issue)
         try:
-            issues = fetch_jira_issues(jira_url, jql_without_version, auth)
+            summary = plan.summarize(current_summarizer(), text, version)
         except Exception as e:
-            raise Exception(f"Failed to fetch fallback Jira issues: {str(e)}")
+            print(f"⚠️ Failed to summarize {issue['key']}, using its full text: {str(e)}")
+            return text
+        if len(summary.split()) >= len(text.split()):
+            summary = text
+        summary_cache.store_issue(cache_scope, issue, summary)
+        return summary
 
-    if not issues:
-        print("⚠️ No issues found with either query. Exiting...")
-        return
+    def issue_summaries(issue_list):
+        """Cached per-issue summaries; issues over plan.condense_words without one are summarized once now."""
+        texts = {}
+        missing = []
+        for issue in issue_list:
+            texts[issue["key"]] = summary_cache.issue_summary(cache_scope, issue)
+            if texts[issue["key"]] is None:
+                texts[issue["key"]] = issue_text(issue)
+                if len(texts[issue["key"]].split()) > plan.condense_words:
+                    missing.append(issue)
+        if missing:
+            print(f"Summarizing {len(missing)} long issues once for the summary cache")
+            workers = plan.summary_workers if plan.summary_mode == "parallel" else 1
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summarize-issue") as pool:
+                for issue, summary in zip(missing, pool.map(condense, missing)):
+                    texts[issue["key"]] = summary
+        return [texts[issue["key"]] for issue in issue_list]
 
-    categories = categorize_issues(issues)
-    summaries = {}
+    def prompt_text(category, lines):
+        if plan.dedup and len(lines) > 1:
+            count = len(lines)
+            lines, clusters = deduplicate_issues(lines, plan.dedup_threshold)
+            if len(clusters) < count:
+                print(f"Deduplicated '{category}': {count} issues -> {len(clusters)} clusters")
+        return " ".join(lines)
 
-    try:
-        if summarizer_type == "huggingface":
-            summarizer = HuggingFaceSummarizer()
-        elif summarizer_type == "openai":
-            if "openai_api_key" not in cfg["summarizer"]:
-                raise Exception("Missing 'openai_api_key' for OpenAI summarizer")
-            summarizer = OpenAISummarizer(cfg["summarizer"]["openai_api_key"])
-        elif summarizer_type == "ollama":
-            summarizer = OllamaSummarizer()
+    jobs = {}
+    for category in pending:
+        issue_list = categories[category]
+        previous, changed, removed = summary_cache.diff(cache_scope, category, issue_list) if summary_cache else (None, issue_list, [])
+        if previous is not None and not changed and not removed:
+            print(f"✅ Reusing cached summary for '{category}' ({len(issue_list)} issues unchanged)")
+            summaries[category] = previous
+            checkpoint.save("summaries", summaries)
+            continue
+        if previous is not None and len(changed) <= plan.merge_max_fraction * len(issue_list):
+            changed_keys = {issue["key"] for issue in changed}
+            unchanged = [issue for issue in issue_list if issue["key"] not in changed_keys]
+            print(f"Rebuilding '{category}' from the summaries of {len(unchanged)} unchanged issues and "
+                  f"{len(changed)} new/changed issues ({len(removed)} removed)")
+            lines = issue_summaries(unchanged) + [issue_text(issue) for issue in changed]
         else:
-            raise Exception(f"Unsupported summarizer: {summarizer_type}")
-    except Exception as e:
-        raise Exception(f"Failed to initialize summarizer: {str(e)}")
-
-    for category, issue_list in categories.items():
-        combined_text = []
-        for issue in issue_list:
-            summary = issue["fields"]["summary"]
-            desc = issue["fields"].get("description", "")
-            desc = extract_adf_text(desc) if isinstance(desc, dict) else desc or ""
-            combined_text.append(f"{summary}: {desc}")
-        full_text = " ".join(combined_text)
+            lines = [issue_text(issue) for issue in issue_list]
+        full_text = prompt_text(category, lines)
         if full_text:
-            try:
-                if summarizer_type == "ollama":
-                    summaries[category] = summarizer.summarize(full_text, version_name=version)
-                elif summarizer_type == "openai":
-                    summaries[category] = summarizer.summarize(full_text, max_words=200)
-                elif summarizer_type == "huggingface":
-                    summaries[category] = summarizer.summarize(full_text)
-            except Exception as e:
-                print(f"⚠️ Failed to summarize '{category}': {str(e)}")
-                summaries[category] = "Summary unavailable"
+            jobs[category] = full_text
 
-    formatters = {
-        "markdown": format_markdown,
-        "json": format_json,
-        "html": format_html
-    }
-    if format not in formatters:
-        raise Exception(f"Unsupported format: {format}")
-    release_notes = formatters[format](version, categories, summaries, categories)
-    markdown_notes = format_markdown(version, categories, summaries, categories)
-
-    output_types = output_config.get("type", [])
-    if "file" in output_types:
-        if "file_path" not in output_config:
-            raise Exception("Missing 'file_path' in output config for file output")
-        file_path = output_config["file_path"]
+    def finish(category, call):
+        try:
+            summary = call()
+        except Exception as e:
+            print(f"⚠️ Failed to summarize '{category}': {str(e)}")
+            failed.append(category)
+            return
+        summaries[category] = summary
+        checkpoint.save("summaries", summaries)
+        if summary_cache:
+            summary_cache.store(cache_scope, category, categories[category], summary)
+
+    if jobs and summarizer is None:
+        summarizer = plan.summarizer()
+    if plan.summary_mode == "batched" and len(jobs) > 1 and hasattr(summarizer, "summarize_batch"):
+        progress("summarize", 0.0, f"Summarizing {len(jobs)} categories in one request")
         try:
-            export_to_file(release_notes, file_path)
-            print(f"✅ File saved to: {file_path}")
+            batch = plan.summarize_batch(summarizer, jobs, version)
         except Exception as e:
-            raise Exception(f"Failed to export to file: {str(e)}")
+            print(f"⚠️ Batched summarization failed: {str(e)}")
+            batch = {}
+        for category, summary in batch.items():
+            finish(category, lambda summary=summary: summary)
+        jobs = {category: text for category, text in jobs.items() if category not in batch}
+        if jobs:
+            print(f"⚠️ No valid batched summary for {', '.join(jobs)}, summarizing separately")
+    elif plan.summary_mode == "batched" and len(jobs) > 1:
+        print(f"⚠️ The {plan.summarizer_type} summarizer does not support batched mode, summarizing each category separately")
 
-    if "confluence" in output_types:
+    if plan.summary_mode == "parallel" and len(jobs) > 1:
+        with ThreadPoolExecutor(max_workers=plan.summary_workers, thread_name_prefix="summarize") as pool:
+            futures = {pool.submit(plan.summarize, summarizer, text, version): category
+                       for category, text in jobs.items()}
+            for position, future in enumerate(as_completed(futures)):
+                finish(futures[future], future.result)
+                progress("summarize", (position + 1) / len(jobs), f"Summarized '{futures[future]}' ({position + 1}/{len(jobs)})")
+    else:
+        for position, (category, text) in enumerate(jobs.items()):
+            progress("summarize", position / len(jobs), f"Summarizing '{category}' ({position + 1}/{len(jobs)})")
+            finish(category, lambda text=text: plan.summarize(summarizer, text, version))
+    if summary_cache:
         try:
-            export_to_confluence(markdown_notes, cfg)
-            print("✅ Published to Confluence")
+            summary_cache.save()
         except Exception as e:
-            raise Exception(f"Failed to export to Confluence: {str(e)}")
+            # The cache only speeds up later runs; never let it fail this one.
+            print(f"⚠️ Failed to save summary cache: {str(e)}")
+    progress("summarize", 1.0, f"Summarized {len(categories)} categories")
+    for category in failed:
+        summaries[category] = "Summary unavailable"
+    summaries = {category: summaries[category] for category in categories if category in summaries}
+
+    try:
+        write_snapshot(snapshot_path(version, plan.snapshot_dir), version, summaries, index)
+    except Exception as e:
+        # The snapshot only serves later re-exports; never let it block this run's outputs.
+        print(f"⚠️ Failed to write snapshot: {str(e)}")
+
+    progress("outputs", 0.0, "Publishing outputs")
+    completed, errors = publish_outputs(plan, version, categories, summaries, index, checkpoint, reuse_outputs)
+    checkpoint.save("outputs", completed)
+    progress("outputs", 1.0, f"Completed {', '.join(completed) or 'no outputs'}")
+    if errors:
+        print("Run again with --resume and the same options to retry only the failed outputs")
+        raise Exception("Failed to export: " + "; ".join(f"{name}: {str(e)}" for name, e in errors.items()))
+    if failed:
+        print(f"⚠️ Summaries unavailable for {', '.join(failed)}; run again with --resume to retry them")
+    else:
+        checkpoint.clear()
+    return {"version": version, "categories": categories, "summaries": summaries, "index": index, "outputs": completed}
+
+def publish_outputs(plan, version, categories, summaries, index, checkpoint=None, reuse_outputs=False):
+    """Render every configured format and run all output sinks concurrently.
+
+    Returns (names of completed sinks, {failed sink name: exception}).
+    """
+    rendered = {}
+    # Sinks call render() from their own threads; each format is rendered and checkpointed once.
+    render_locks = {fmt: threading.Lock() for fmt in FORMATTERS}
+
+    def render(fmt):
+        with render_locks[fmt]:
+            if fmt not in rendered:
+                content = checkpoint.load_rendered(fmt) if reuse_outputs else None
+                if content is None:
+                    content = plan.formatters[fmt](version, categories, summaries, index, plan.order, plan.top_n)
+                    if checkpoint is not None:
+                        checkpoint.save_rendered(fmt, content)
+                rendered[fmt] = content
+            return rendered[fmt]
+
+    sinks = plan.sinks(version, render)
+    completed = (checkpoint.load("outputs") or []) if reuse_outputs else []
+    for name in completed:
+        if sinks.pop(name, None) is not None:
+            print(f"✅ Output '{name}' already completed in the previous run, skipping")
+
+    results, errors = dispatch_outputs(sinks)
+    for name in sinks:
+        if name in results:
+            print(f"✅ Output '{name}' completed")
+    return completed + [name for name in sinks if name in results], errors
+
+def render_snapshot(cfg, path):
+    """Re-export a release from its snapshot: no Jira fetch, no summarization."""
+    plan = cfg if isinstance(cfg, RunPlan) else RunPlan(cfg)
+    with Snapshot(path) as snapshot:
+        index = snapshot.to_index()
+        version, summaries = snapshot.version, snapshot.summaries
+    print(f"✅ Loaded {len(index)} issues for {version} from snapshot {path}")
+    _, errors = publish_outputs(plan, version, index.group_by("issuetype"), summaries, index)
+    if errors:
+        raise Exception("Failed to export: " + "; ".join(f"{name}: {str(e)}" for name, e in errors.items()))
 
 def run_cli():
     """Run the command-line interface."""
@@ -152,23 +292,32 @@ def run_cli():
     parser.add_argument("--jira-token", help="Jira API token")
     parser.add_argument("--version", default="Test-release-0.1.0", help="Release version")
     parser.add_argument("--jql", help="Custom JQL query")
-    parser.add_argument("--summarizer", choices=["huggingface", "openai", "ollama"], default="huggingface", help="Summarizer type")
+    parser.add_argument("--summarizer", choices=["huggingface", "onnx", "openai", "ollama"], default="huggingface", help="Summarizer type")
     parser.add_argument("--openai-api-key", help="OpenAI API key (required for openai summarizer)")
+    parser.add_argument("--ollama-host", nargs="+", default=["http://host.docker.internal:11434"], help="Ollama host URLs (space-separated); requests go to the least-loaded one")
+    parser.add_argument("--ollama-model", default="llama3.1", help="Ollama model, preloaded and kept loaded for the run")
+    parser.add_argument("--summarizer-mode", choices=["sequential", "parallel", "batched"], default="sequential", help="Summarize categories one by one, concurrently, or all in one request (openai/ollama)")
+    parser.add_argument("--no-dedup", action="store_true", help="Summarize every issue instead of one per cluster of near-duplicates")
     parser.add_argument("--output", nargs="+", choices=["file", "confluence"], default=["file"], help="Output types (space-separated)")
     parser.add_argument("--file-path", default="output/release_notes.md", help="File path for file output")
-    parser.add_argument("--file-format", choices=["markdown", "json", "html"], default="markdown", help="File format")
+    parser.add_argument("--file-format", nargs="+", choices=["markdown", "json", "html"], default=["markdown"], help="File formats (space-separated)")
+    parser.add_argument("--sort", choices=["priority", "status", "key"], help="Sort the detailed issues list")
+    parser.add_argument("--top-n", type=int, help="Show only the top N issues per category")
     parser.add_argument("--confluence-url", default="https://uat-givaudan.atlassian.net/wiki", help="Confluence URL")
     parser.add_argument("--confluence-username", help="Confluence username")
     parser.add_argument("--confluence-token", help="Confluence API token")
     parser.add_argument("--space-key", default="FP", help="Confluence space key")
     parser.add_argument("--page-title", default="Release Notes - {version}", help="Confluence page title")
     parser.add_argument("--parent-page-id", help="Confluence parent page ID")
+    parser.add_argument("--resume", action="store_true", help="Resume the last failed run with the same options from its checkpoints")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=PROFILE_MODES, help="Profile the run (cProfile by default, or low-overhead stack sampling) with tracemalloc; writes collapsed stacks, pstats and allocation snapshots to output/profiles")
+    parser.add_argument("--from-snapshot", help="Re-export a previously fetched release from its snapshot (output/snapshots/<version>.rns) without Jira or summarization")
 
     args = parser.parse_args()
 
     # Prompt for missing required fields
-    jira_username = args.jira_username or input("Jira Username: ")
-    jira_token = args.jira_token or input("Jira API Token: ")
+    jira_username = args.jira_username or ("" if args.from_snapshot else input("Jira Username: "))
+    jira_token = args.jira_token or ("" if args.from_snapshot else input("Jira API Token: "))
     if "confluence" in args.output:
         confluence_username = args.confluence_username or input("Confluence Username: ")
         confluence_token = args.confluence_token or input("Confluence API Token: ")
@@ -181,32 +330,46 @@ def run_cli():
         },
         "version": args.version,
         "summarizer": {
-            "type": args.summarizer
+            "type": args.summarizer,
+            "mode": args.summarizer_mode,
+            "dedup": not args.no_dedup
         },
         "output": {
             "type": args.output
         }
     }
+    if args.sort:
+        cfg["output"]["sort"] = args.sort
+    if args.top_n:
+        cfg["output"]["top_n"] = args.top_n
     if args.jql:
         cfg["jira"]["jql"] = args.jql
-    if args.summarizer == "openai":
+    if args.summarizer == "ollama":
+        cfg["summarizer"]["ollama"] = {"hosts": args.ollama_host, "model": args.ollama_model}
+    if args.summarizer == "openai" and not args.from_snapshot:
         openai_api_key = args.openai_api_key or input("OpenAI API Key: ")
         cfg["summarizer"]["openai_api_key"] = openai_api_key
     if "file" in args.output:
         cfg["output"]["file_path"] = args.file_path
-        cfg["output"]["format"] = args.file_format
+        cfg["output"]["formats"] = args.file_format
     if "confluence" in args.output:
         cfg["output"]["confluence"] = {
             "url": args.confluence_url,
             "username": confluence_username,
             "api_token": confluence_token,
             "space_key": args.space_key,
-            "page_title": args.page_title.format(version=args.version),
+            "page_title": args.page_title,
             "parent_page_id": args.parent_page_id
         }
 
+    profiler = RunProfiler(args.version, args.profile) if args.profile else None
     try:
-        generate_release_notes(cfg)
+        plan = RunPlan(cfg)
+        with profiler or nullcontext():
+            if args.from_snapshot:
+                render_snapshot(plan, args.from_snapshot)
+            else:
+                generate_release_notes(plan, resume=args.resume, progress=profiler.progress() if profiler else None)
     except Exception as e:
         print(f"Error: {str(e)}")
         sys.exit(1)
@@ -0,0 +1,95 @@
+import re
+import zlib
+import numpy as np
+
+MERSENNE_PRIME = 4294967291  # largest prime below 2**32, keeps a * x + b inside uint64
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def _shingles(text, size=2):
+    tokens = TOKEN_RE.findall(text.lower())
+    if len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+def minhash_signatures(texts, num_perm=64, seed=42, chunk_size=65536):
+    """MinHash signatures for all texts, vectorized over (num_perm, shingles) NumPy blocks.
+
+    Texts without any tokens get a None signature and always stay singletons.
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    hashed, offsets, non_empty = [], [], []
+    for i, text in enumerate(texts):
+        shingles = _shingles(text)
+        if shingles:
+            offsets.append(len(hashed))
+            hashed.extend(zlib.crc32(s.encode("utf-8")) for s in shingles)
+            non_empty.append(i)
+
+    signatures = [None] * len(texts)
+    values = np.array(hashed, dtype=np.uint64)
+    bounds = offsets + [len(hashed)]
+    start = 0
+    while start < len(non_empty):
+        # Bound the (num_perm, shingles) matrix to roughly chunk_size shingles at a time.
+        end = start + 1
+        while end < len(non_empty) and bounds[end + 1] - bounds[start] <= chunk_size:
+            end += 1
+        chunk = values[bounds[start]:bounds[end]]
+        permuted = (a[:, None] * chunk[None, :] + b[:, None]) % np.uint64(MERSENNE_PRIME)
+        mins = np.minimum.reduceat(permuted, np.array(bounds[start:end]) - bounds[start], axis=1)
+        for column, i in enumerate(non_empty[start:end]):
+            signatures[i] = mins[:, column]
+        start = end
+    return signatures
+
+def cluster_texts(texts, threshold=0.6, num_perm=64, bands=16):
+    """Group near-duplicate texts with MinHash + LSH banding.
+
+    Candidate pairs come from LSH buckets and are kept when their estimated
+    Jaccard similarity reaches `threshold`. Returns clusters as lists of
+    indices, each in input order; clusters are ordered by their first member.
+    """
+    signatures = minhash_signatures(texts, num_perm)
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = num_perm // bands
+    for band in range(bands):
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            if signature is not None:
+                buckets.setdefault(signature[band * rows:(band + 1) * rows].tobytes(), []).append(i)
+        for members in buckets.values():
+            for other in members[1:]:
+                first = members[0]
+                root_first, root_other = find(first), find(other)
+                if root_first != root_other and np.mean(signatures[first] == signatures[other]) >= threshold:
+                    parent[max(root_first, root_other)] = min(root_first, root_other)
+
+    clusters = {}
+    for i in range(len(texts)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+def deduplicate_issues(issue_texts, threshold=0.6):
+    """Collapse near-duplicate issue texts into one representative line per cluster.
+
+    The representative is the first issue of the cluster (Jira order); the
+    others are only counted, so the summarizer sees each incident once.
+    """
+    clusters = cluster_texts(issue_texts, threshold)
+    lines = []
+    for members in clusters:
+        line = issue_texts[members[0]]
+        if len(members) > 1:
+            line += f" (plus {len(members) - 1} similar issue{'s' if len(members) > 2 else ''})"
+        lines.append(line)
+    return lines, clusters
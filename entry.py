@@ -4,7 +4,19 @@ import yaml
 
 def main():
     if len(sys.argv) > 1 and sys.argv[1] == "--cli":
-        from cli import generate_release_notes
+        from contextlib import nullcontext
+        from cli import generate_release_notes, render_snapshot
+        from profiling import PROFILE_MODES, RunProfiler
+        from run_plan import RunPlan
+
+        snapshot = None
+        if "--from-snapshot" in sys.argv:
+            snapshot = sys.argv[sys.argv.index("--from-snapshot") + 1:][:1]
+            if not snapshot or snapshot[0].startswith("--"):
+                print("Usage: entry.py --cli --from-snapshot <path to .rns snapshot>")
+                sys.exit(2)
+            snapshot = snapshot[0]
+
         # Load config.yaml
         try:
             with open("/app/config.yaml", "r") as f:
@@ -21,7 +33,21 @@ def main():
             print(f"Error: {str(e)}. Please fix config.yaml and rebuild the image.")
             sys.exit(1)
 
-        generate_release_notes(cfg)
+        try:
+            plan = RunPlan(cfg)
+        except Exception as e:
+            print(f"Error: {str(e)}. Please fix config.yaml and rebuild the image.")
+            sys.exit(1)
+
+        profiler = None
+        if "--profile" in sys.argv:
+            mode = sys.argv[sys.argv.index("--profile") + 1:][:1]
+            profiler = RunProfiler(str(cfg.get("version", "run")), mode[0] if mode and mode[0] in PROFILE_MODES else "cprofile")
+        with profiler or nullcontext():
+            if snapshot:
+                render_snapshot(plan, snapshot)
+            else:
+                generate_release_notes(plan, resume="--resume" in sys.argv, progress=profiler.progress() if profiler else None)
     else:
         print("Starting Streamlit UI...")
         subprocess.run(["streamlit", "run", "ui.py", "--server.port=8501", "--server.address=0.0.0.0"])
@@ -2,106 +2,99 @@ import requests
 from requests.auth import HTTPBasicAuth
 from urllib.parse import quote_plus
 import re
+import rate_limiter
+
+# One alternative per block type; finditer walks the whole document in a single pass.
+# Groups are greedy and trailing whitespace/pipes are stripped in code, which avoids backtracking.
+TOKEN_RE = re.compile(r"""
+    ^[ \t]*(?:
+        (?P<heading>\#{1,6})[ \t]+(?P<heading_text>.*)
+      | (?P<separator>\|(?:[ \t]*:?-+:?[ \t]*\|)+)[ \t]*$
+      | \|(?P<row>.*)
+      | [*-][ \t]+(?P<item>.*)
+      | (?P<text>\S.*)
+    )""", re.MULTILINE | re.VERBOSE)
+BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+CELL_SPLIT_RE = re.compile(r"(?<!\\)\|")
+COLUMN_WIDTHS = {"Priority": 120, "Key": 80, "Summary": 400, "Status": 100}
+
+def escape_xml(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def bold(text):
+    return BOLD_RE.sub(r"<strong>\1</strong>", text) if "**" in text else text
+
+def process_text(text):
+    """Escape XML special characters and convert inline Markdown bold."""
+    return bold(escape_xml(text))
+
+def split_cells(row):
+    row = row.rstrip()
+    if row.endswith("|") and not row.endswith("\\|"):
+        row = row[:-1]
+    if "\\|" not in row:
+        return [cell.strip() for cell in row.split("|")]
+    return [cell.strip().replace("\\|", "|") for cell in CELL_SPLIT_RE.split(row)]
+
+def colgroup(headers):
+    cols = "".join(f'<col style="width:{COLUMN_WIDTHS[h]}px"/>' if h in COLUMN_WIDTHS else "<col/>" for h in headers)
+    return f"<colgroup>{cols}</colgroup>"
+
+def table_row(cells, tag="td"):
+    """Cells must already be XML-escaped."""
+    return f"<tr><{tag}>" + f"</{tag}><{tag}>".join(bold(cell) for cell in cells) + f"</{tag}></tr>"
 
 def markdown_to_storage(markdown_content):
-    """Convert Markdown to Confluence Storage Format with improved formatting."""
-    lines = markdown_content.split("\n")
-    storage_lines = []
-    in_table = False
+    """Convert Markdown to Confluence Storage Format with improved formatting.
+
+    The document is XML-escaped once up front and then tokenized in a single
+    pass. The Markdown is already sorted and cut to top-N by the formatter,
+    so its tables are converted as they are.
+    """
+    out = []
+    in_table = False   # True once a header row has been emitted
     in_list = False
-
-    def process_text(text):
-        """Handle inline Markdown like bold."""
-        text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)  # Bold
-        return text
-
-    for line in lines:
-        line = line.strip()
-
-        # Headings
-        if line.startswith("# "):
-            if in_table:
-                storage_lines.append("</table>")
-                in_table = False
-            if in_list:
-                storage_lines.append("</ul>")
-                in_list = False
-            storage_lines.append(f"<h1>{process_text(line[2:].strip())}</h1>")
-        elif line.startswith("## "):
-            if in_table:
-                storage_lines.append("</table>")
-                in_table = False
-            if in_list:
-                storage_lines.append("</ul>")
-                in_list = False
-            storage_lines.append(f"<h2>{process_text(line[3:].strip())}</h2>")
-        elif line.startswith("### "):
-            if in_table:
-                storage_lines.append("</table>")
-                in_table = False
-            if in_list:
-                storage_lines.append("</ul>")
-                in_list = False
-            storage_lines.append(f"<h3>{process_text(line[4:].strip())}</h3>")
-
-        # Table start
-        elif line.startswith("|") and not in_table and not in_list:
-            in_table = True
-            storage_lines.append('<table><colgroup><col style="width:120px"/><col style="width:80px"/><col style="width:400px"/><col style="width:100px"/></colgroup>')
-            headers = [h.strip() for h in line.split("|")[1:-1]]
-            storage_lines.append("<tr>")
-            for header in headers:
-                storage_lines.append(f"<th>{process_text(header)}</th>")
-            storage_lines.append("</tr>")
-
-        # Table separator
-        elif in_table and re.match(r"^\|[-:\s]+\|", line):
-            continue
-
-        # Table row
-        elif in_table and line.startswith("|"):
-            cells = [c.strip() for c in line.split("|")[1:-1]]
-            storage_lines.append("<tr>")
-            for cell in cells:
-                storage_lines.append(f"<td>{process_text(cell)}</td>")
-            storage_lines.append("</tr>")
-
-        # List item
-        elif line.startswith("* "):
-            if in_table:
-                storage_lines.append("</table>")
-                in_table = False
+    last_end = 0
+
+    for token in TOKEN_RE.finditer(escape_xml(markdown_content)):
+        kind = token.lastgroup
+        # A blank line between two tokens closes any open table or list.
+        blank_gap = token.string.count("\n", last_end, token.start()) > 1
+        last_end = token.end()
+        if in_table and (blank_gap or kind not in ("row", "separator")):
+            out.append("</table>")
+            in_table = False
+        if in_list and (blank_gap or kind != "item"):
+            out.append("</ul>")
+            in_list = False
+
+        if kind == "row":
+            cells = split_cells(token.group("row"))
+            if not in_table:
+                in_table = True
+                out.append(f"<table>{colgroup(cells)}{table_row(cells, 'th')}")
+            else:
+                out.append(table_row(cells))
+        elif kind == "item":
             if not in_list:
-                storage_lines.append("<ul>")
+                out.append("<ul>")
                 in_list = True
-            storage_lines.append(f"<li>{process_text(line[2:].strip())}</li>")
-
-        # End of table or list
-        elif (in_table or in_list) and not line.startswith("|") and not line.startswith("* "):
-            if in_table:
-                storage_lines.append("</table>")
-                in_table = False
-            if in_list:
-                storage_lines.append("</ul>")
-                in_list = False
-            if line:
-                storage_lines.append(f"<p>{process_text(line)}</p>")
-
-        # Regular paragraph
-        elif line and not in_table and not in_list:
-            storage_lines.append(f"<p>{process_text(line)}</p>")
-
-    # Close any open tags
+            out.append(f"<li>{bold(token.group('item').strip())}</li>")
+        elif kind == "heading_text":
+            level = len(token.group("heading"))
+            out.append(f"<h{level}>{bold(token.group('heading_text').strip())}</h{level}>")
+        elif kind == "text":
+            out.append(f"<p>{bold(token.group('text').rstrip())}</p>")
+
     if in_table:
-        storage_lines.append("</table>")
+        out.append("</table>")
     if in_list:
-        storage_lines.append("</ul>")
-
-    return "".join(storage_lines)
+        out.append("</ul>")
+    return "".join(out)
 
 def check_existing_page(url, title, space_key, auth):
     check_url = f"{url}/rest/api/content?title={quote_plus(title)}&spaceKey={space_key}"
-    response = requests.get(check_url, auth=auth)
+    response = rate_limiter.request("GET", check_url, auth=auth)
     if response.status_code == 200 and response.json()["results"]:
         return response.json()["results"][0]["id"]
     return None
@@ -137,10 +130,10 @@ def export_to_confluence(content, cfg):
     try:
         if existing_page_id:
             update_url = f"{url}/{existing_page_id}"
-            payload["version"] = {"number": int(requests.get(update_url, auth=auth).json()["version"]["number"]) + 1}
-            response = requests.put(update_url, json=payload, headers=headers, auth=auth)
+            payload["version"] = {"number": int(rate_limiter.request("GET", update_url, auth=auth).json()["version"]["number"]) + 1}
+            response = rate_limiter.request("PUT", update_url, json=payload, headers=headers, auth=auth)
         else:
-            response = requests.post(url, json=payload, headers=headers, auth=auth)
+            response = rate_limiter.request("POST", url, json=payload, headers=headers, auth=auth)
         response.raise_for_status()
         page_id = response.json()["id"]
         print(f"✅ Published to Confluence: {confluence_cfg['url']}/pages/viewpage.action?pageId={page_id}")
@@ -0,0 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+def dispatch_outputs(sinks, max_workers=None):
+    """Run every output sink concurrently and isolate their failures.
+
+    `sinks` maps a sink name (e.g. "file:markdown", "confluence") to a
+    zero-argument callable. Every sink runs to completion regardless of how
+    the others fare; returns ({name: result}, {name: exception}).
+    """
+    results, errors = {}, {}
+    if not sinks:
+        return results, errors
+    with ThreadPoolExecutor(max_workers=max_workers or len(sinks), thread_name_prefix="sink") as pool:
+        futures = {pool.submit(sink): name for name, sink in sinks.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+                print(f"⚠️ Output '{name}' failed: {str(e)}")
+    return results, errors
@@ -1,11 +1,18 @@
-def export_to_file(content, file_path):
+import os
+
+def export_to_file(content, file_path, fallback_path="release_notes.md"):
+    """Write content to file_path, creating its directory; on failure write to fallback_path, or raise if it is None."""
     try:
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
         with open(file_path, "w") as f:
             f.write(content)
         print(f"✅ Release Notes Saved to {file_path}")
     except Exception as e:
+        if fallback_path is None:
+            raise Exception(f"Failed to save release notes to {file_path}: {str(e)}")
         print(f"❌ Error saving release notes: {str(e)}")
-        fallback_path = "release_notes.md"
         with open(fallback_path, "w") as f:
             f.write(content)
-        print(f"✅ Saved to fallback: {fallback_path}")
\ No newline at end of file
+        print(f"✅ Saved to fallback: {fallback_path}")
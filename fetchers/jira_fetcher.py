@@ -1,14 +1,129 @@
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from urllib.parse import quote_plus
-import requests
+import rate_limiter
 
-def fetch_jira_issues(jira_url, jql, auth):
+PAGE_SIZE = 100
+ORDER_BY_RE = re.compile(r"\s+ORDER\s+BY\s+.*$", re.IGNORECASE | re.DOTALL)
+ISSUETYPE_IN_RE = re.compile(r"issuetype\s+IN\s*\(([^)]*)\)", re.IGNORECASE)
+
+def search(jira_url, jql, auth, start_at=0, max_results=PAGE_SIZE, fields=None):
     encoded_jql = quote_plus(jql)
-    url = f"{jira_url}/rest/api/3/search?jql={encoded_jql}"
+    url = f"{jira_url}/rest/api/3/search?jql={encoded_jql}&startAt={start_at}&maxResults={max_results}"
+    if fields:
+        url += f"&fields={','.join(fields)}"
     headers = {"Content-Type": "application/json"}
-    response = requests.get(url, headers=headers, auth=auth)
+    response = rate_limiter.request("GET", url, headers=headers, auth=auth)
     if response.status_code == 200:
-        data = response.json()
-        if data.get("total", 0) > 0:
-            return data["issues"]
-        return None
-    raise Exception(f"Failed to fetch issues: {response.status_code}, Response: {response.text}")
\ No newline at end of file
+        return response.json()
+    raise Exception(f"Failed to fetch issues: {response.status_code}, Response: {response.text}")
+
+def count_issues(jira_url, jql, auth):
+    return search(jira_url, jql, auth, max_results=0).get("total", 0)
+
+def fetch_paginated(jira_url, jql, auth, pool, first=None):
+    """All pages of one query; pages after the first (fetched here unless given) are requested concurrently."""
+    first = first if first is not None else search(jira_url, jql, auth)
+    total = first.get("total", 0)
+    pages = [pool.submit(search, jira_url, jql, auth, start_at) for start_at in range(PAGE_SIZE, total, PAGE_SIZE)]
+    issues = list(first.get("issues", []))
+    for page in pages:
+        issues.extend(page.result().get("issues", []))
+    return issues
+
+def _split_jql(jql):
+    """Split 'filter ORDER BY ...' so shard conditions can be ANDed onto the filter."""
+    match = ORDER_BY_RE.search(jql)
+    return (jql[:match.start()], jql[match.start():]) if match else (jql, "")
+
+def _created_bounds(jira_url, jql, auth):
+    base, _ = _split_jql(jql)
+    bounds = []
+    for direction in ("ASC", "DESC"):
+        issues = search(jira_url, f"{base} ORDER BY created {direction}", auth, max_results=1, fields=["created"])["issues"]
+        bounds.append(datetime.strptime(issues[0]["fields"]["created"][:16], "%Y-%m-%dT%H:%M"))
+    return bounds
+
+def _date_windows(jira_url, jql, auth, count, shard_size):
+    """Disjoint created-date windows; the outer ones are open-ended so no issue falls through a timezone gap."""
+    windows = math.ceil(count / shard_size)
+    oldest, newest = _created_bounds(jira_url, jql, auth)
+    step = max((newest - oldest + timedelta(minutes=1)) / windows, timedelta(minutes=1))
+    edges = sorted({(oldest + step * i).strftime("%Y/%m/%d %H:%M") for i in range(1, windows)})
+    conditions = []
+    for i in range(len(edges) + 1):
+        parts = []
+        if i > 0:
+            parts.append(f'created >= "{edges[i - 1]}"')
+        if i < len(edges):
+            parts.append(f'created < "{edges[i]}"')
+        conditions.append(" AND ".join(parts))
+    return [c for c in conditions if c]
+
+def plan_shards(jira_url, jql, auth, total, shard_size, pool):
+    """Disjoint sub-queries for a large JQL: one per issuetype, then created-date windows for big types.
+
+    Splitting by issuetype is only used when the per-type counts add up to the
+    total, i.e. the `issuetype IN (...)` clause really bounds the whole query
+    (it could sit inside an OR). Returns (query, expected count label) pairs;
+    window counts are estimates.
+    """
+    base, order_by = _split_jql(jql)
+    candidates, counts = [base], [total]
+    match = ISSUETYPE_IN_RE.search(base)
+    if match:
+        types = [t.strip().strip("\"'") for t in match.group(1).split(",") if t.strip()]
+        type_queries = [f"({base}) AND issuetype = \"{t}\"" for t in types]
+        type_counts = list(pool.map(lambda q: count_issues(jira_url, q, auth), type_queries))
+        if sum(type_counts) == total:
+            candidates, counts = type_queries, type_counts
+        else:
+            print(f"⚠️ Per-issuetype counts ({sum(type_counts)}) do not add up to {total}, sharding by created date only")
+
+    shards = []
+    for query, count in zip(candidates, counts):
+        if count == 0:
+            continue
+        if count <= shard_size:
+            shards.append((query + order_by, str(count)))
+            continue
+        windows = _date_windows(jira_url, query, auth, count, shard_size)
+        for window in windows:
+            shards.append((f"({query}) AND {window}{order_by}", f"~{count // len(windows)}"))
+    return shards
+
+def fetch_jira_issues(jira_url, jql, auth, shard_size=1000, max_workers=8):
+    """Fetch every issue matching the JQL, sharding large result sets into concurrent disjoint sub-queries."""
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jira") as pool:
+        # The first page also carries the total, so small queries need no separate count request.
+        first = search(jira_url, jql, auth)
+        total = first.get("total", 0)
+        if total == 0:
+            return None
+        if total <= shard_size:
+            return fetch_paginated(jira_url, jql, auth, pool, first)
+
+        shards = plan_shards(jira_url, jql, auth, total, shard_size, pool)
+        print(f"Sharding {total} issues into {len(shards)} queries:")
+        for query, count in shards:
+            print(f"  [{count}] {query}")
+        # Shards run on their own pool so their page requests can use the shared one without deadlocking.
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jira-shard") as shard_pool:
+            results = list(shard_pool.map(lambda shard: fetch_paginated(jira_url, shard[0], auth, pool), shards))
+
+    issues = list(first.get("issues", []))
+    seen = {issue["key"] for issue in issues}
+    for (query, _), shard_issues in zip(shards, results):
+        print(f"  fetched {len(shard_issues)} issues for shard {query}")
+        for issue in shard_issues:
+            if issue["key"] not in seen:
+                seen.add(issue["key"])
+                issues.append(issue)
+    if len(issues) != total:
+        print(f"⚠️ Fetched {len(issues)} unique issues from {len(shards)} shards but Jira reported {total}; "
+              f"issues may have changed during the fetch or the JQL could not be sharded exactly")
+    else:
+        print(f"✅ Fetched {len(issues)} unique issues from {len(shards)} shards")
+    return issues
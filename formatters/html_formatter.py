@@ -1,4 +1,6 @@
-def format_html(version, categories, summaries, issues):
+from formatters.issue_index import as_index
+
+def format_html(version, categories, summaries, issues, order=None, top_n=None):
     html = f"""<!DOCTYPE html>
 <html>
 <head><title>Release Notes - {version}</title></head>
@@ -11,8 +13,7 @@ def format_html(version, categories, summaries, issues):
     for category, summary in summaries.items():
         html += f"<h3>{category}s</h3><p>{summary}</p>"
     html += "<h2>Detailed Issues List</h2><table border='1'><tr><th>Priority</th><th>Key</th><th>Summary</th><th>Status</th></tr>"
-    for category, issue_list in issues.items():
-        for issue in issue_list:
-            html += f"<tr><td>{issue['fields']['priority']['name']}</td><td>{issue['key']}</td><td>{issue['fields']['summary']}</td><td>{issue['fields']['status']['name']}</td></tr>"
+    for priority, key, summary, status in as_index(issues).rows(order, top_n):
+        html += f"<tr><td>{priority}</td><td>{key}</td><td>{summary}</td><td>{status}</td></tr>"
     html += "</table><p>A big shoutout to these amazing individuals who helped make this release a success! 🎉</p><p>Thanks,<br><b>Go CI/CD</b></p></body></html>"
     return html
\ No newline at end of file
@@ -0,0 +1,113 @@
+PRIORITY_RANK = {
+    "Blocker": 0,
+    "Highest": 0,
+    "Critical": 1,
+    "High": 1,
+    "Major": 2,
+    "Medium": 2,
+    "Minor": 3,
+    "Low": 3,
+    "Trivial": 4,
+    "Lowest": 4,
+}
+
+SORT_ORDERS = ("priority", "status", "key")
+
+
+def _key_sort_value(key):
+    """Sort 'CICD-9' before 'CICD-10' by splitting the project prefix from the number."""
+    project, _, number = key.rpartition("-")
+    return (project, int(number)) if number.isdigit() else (key, 0)
+
+
+class IssueIndex:
+    """Precomputed, sorted views over the fetched issues.
+
+    Built once per run so every formatter and the Confluence converter read the
+    same flattened rows instead of walking and re-sorting the raw Jira dicts.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self._orders = {}
+        self._groups = {}
+
+    @classmethod
+    def from_issues(cls, issues):
+        records = []
+        for position, issue in enumerate(issues):
+            fields = issue.get("fields", {})
+            records.append({
+                "key": issue["key"],
+                "issuetype": (fields.get("issuetype") or {}).get("name", ""),
+                "priority": (fields.get("priority") or {}).get("name", ""),
+                "status": (fields.get("status") or {}).get("name", ""),
+                "summary": fields.get("summary") or "",
+                "position": position,
+                "fields": fields,
+            })
+        return cls(records)
+
+    @classmethod
+    def from_categories(cls, categories):
+        return cls.from_issues(issue for issue_list in categories.values() for issue in issue_list)
+
+    def __len__(self):
+        return len(self.records)
+
+    def _sort_key(self, order):
+        if order == "priority":
+            return lambda r: (PRIORITY_RANK.get(r["priority"], len(PRIORITY_RANK)), r["priority"], _key_sort_value(r["key"]))
+        if order == "status":
+            return lambda r: (r["status"], _key_sort_value(r["key"]))
+        if order == "key":
+            return lambda r: _key_sort_value(r["key"])
+        raise ValueError(f"Unsupported sort order: {order}. Choose from {SORT_ORDERS}")
+
+    def sorted(self, order=None):
+        """Return records sorted by 'priority', 'status' or 'key'; None keeps Jira order."""
+        if order is None:
+            return self.records
+        if order not in self._orders:
+            self._orders[order] = sorted(self.records, key=self._sort_key(order))
+        return self._orders[order]
+
+    def group_by(self, field="issuetype", order=None, top_n=None):
+        """Group records by a flattened column or any raw Jira field, keeping first-seen group order."""
+        if field not in self._groups:
+            groups = {}
+            for record in self.records:
+                groups.setdefault(self._field_value(record, field), []).append(record)
+            self._groups[field] = groups
+        grouped = {}
+        for value, records in self._groups[field].items():
+            if order is not None:
+                records = sorted(records, key=self._sort_key(order))
+            grouped[value] = records[:top_n] if top_n else records
+        return grouped
+
+    def rows(self, order=None, top_n=None, group_field="issuetype"):
+        """Flat (priority, key, summary, status) rows for issue tables, optionally top-N per group."""
+        if top_n:
+            records = [r for group in self.group_by(group_field, order, top_n).values() for r in group]
+        else:
+            records = self.sorted(order)
+        return [(r["priority"], r["key"], r["summary"], r["status"]) for r in records]
+
+    @staticmethod
+    def _field_value(record, field):
+        if field in record and field != "fields":
+            return record[field]
+        value = record["fields"].get(field)
+        if isinstance(value, dict):
+            return value.get("name") or value.get("value") or value.get("displayName") or ""
+        if isinstance(value, list):
+            return ", ".join(str(v.get("name", v)) if isinstance(v, dict) else str(v) for v in value)
+        return value if value is not None else ""
+
+
+def as_index(issues):
+    """Accept an IssueIndex or the legacy {category: [issue, ...]} dict."""
+    if isinstance(issues, IssueIndex):
+        return issues
+    return IssueIndex.from_categories(issues)
@@ -1,11 +1,13 @@
 import json
+from formatters.issue_index import as_index
 
-def format_json(version, categories, summaries, issues):
+def format_json(version, categories, summaries, issues, order=None, top_n=None):
     data = {
         "version": version,
         "summary": summaries,
-        "issues": {category: [{"key": issue["key"], "summary": issue["fields"]["summary"],
-                               "priority": issue["fields"]["priority"]["name"], "status": issue["fields"]["status"]["name"]}
-                              for issue in issue_list] for category, issue_list in issues.items()}
+        "issues": {category: [{"key": record["key"], "summary": record["summary"],
+                               "priority": record["priority"], "status": record["status"]}
+                              for record in record_list]
+                   for category, record_list in as_index(issues).group_by("issuetype", order, top_n).items()}
     }
     return json.dumps(data, indent=2)
\ No newline at end of file
@@ -1,4 +1,6 @@
-def format_markdown(version, categories, summaries, issues):
+from formatters.issue_index import as_index
+
+def format_markdown(version, categories, summaries, issues, order=None, top_n=None):
     release_notes = f"""# Release Notes - {version}
 
 Hello there,
@@ -13,13 +15,9 @@ We are glad to inform you that the latest version **{version}** of **Go CI/CD**
     release_notes += "## **Detailed Issues List**\n\n"
     release_notes += "| Priority  | Key   | Summary | Status  |\n"
     release_notes += "|-----------|------|---------|---------|\n"
-    for category, issue_list in issues.items():
-        for issue in issue_list:
-            priority = issue['fields']['priority']['name']
-            key = issue['key']
-            summary = issue['fields']['summary']
-            status = issue['fields']['status']['name']
-            release_notes += f"| {priority} | {key} | {summary} | {status} |\n"
+    for priority, key, summary, status in as_index(issues).rows(order, top_n):
+        summary = summary.replace("|", "\\|")
+        release_notes += f"| {priority} | {key} | {summary} | {status} |\n"
 
     release_notes += ("\nA big shoutout to these amazing individuals who helped make this release a success! 🎉\n"
                       "Thanks,\n"
@@ -0,0 +1,170 @@
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+PROFILE_MODES = ("cprofile", "sampling")
+# tracemalloc is process-global: a second profiled run would have it stopped under it by the first to finish.
+_active = threading.Lock()
+
+def profiling_active():
+    """Whether a profiled run is in progress in this process; only one may run at a time."""
+    return _active.locked()
+
+class RunProfiler:
+    """Profile one pipeline run: cProfile or stack sampling, plus tracemalloc snapshots.
+
+    Files are written under `directory` as <name>-<timestamp>.*:
+    .collapsed holds wall-clock stacks sampled from the profiled thread and
+    every thread it starts ("thread;frame;...;frame count" per line, the input
+    format of flamegraph.pl and speedscope), .pstats the cProfile stats of the
+    profiled thread (cprofile mode only), and .<stage>.tracemalloc an
+    allocation snapshot taken as each stage completes and at the end.
+    """
+
+    def __init__(self, name, mode="cprofile", directory="output/profiles", interval=0.005, top_n=20):
+        if mode not in PROFILE_MODES:
+            raise Exception(f"Unsupported profile mode: {mode}")
+        self.name = name
+        self.mode = mode
+        self.interval = interval
+        self.top_n = top_n
+        file_name = re.sub(r"[^\w.-]+", "_", name)
+        self.prefix = os.path.join(directory, f"{file_name}-{datetime.now():%Y%m%d-%H%M%S}")
+        self.stacks = Counter()
+        self.snapshots = {}
+        self.paths = []
+        self.summary = ""
+        self._profile = None
+
+    def start(self):
+        if not _active.acquire(blocking=False):
+            raise Exception("Another profiled run is in progress; only one run can be profiled at a time")
+        try:
+            os.makedirs(os.path.dirname(self.prefix) or ".", exist_ok=True)
+        except BaseException:
+            _active.release()
+            raise
+        tracemalloc.start()
+        # Threads that already exist (e.g. other UI sessions) are not part of this run.
+        self._baseline = set(sys._current_frames()) - {threading.get_ident()}
+        self._stop = threading.Event()
+        self._paused = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._sampler.start()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if self._paused.is_set():
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self._baseline:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def snapshot(self, label):
+        # Taking and dumping a snapshot is profiler work, keep it out of the run's profile.
+        self._paused.set()
+        if self._profile is not None:
+            self._profile.disable()
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            path = f"{self.prefix}.{label}.tracemalloc"
+            snapshot.dump(path)
+            self.snapshots[label] = snapshot
+            self.paths.append(path)
+        finally:
+            if self._profile is not None and not self._stop.is_set():
+                self._profile.enable()
+            self._paused.clear()
+        return snapshot
+
+    def progress(self, inner=None):
+        """Progress callback for generate_release_notes() that snapshots allocations as each stage completes."""
+        def callback(stage, fraction, message):
+            if fraction >= 1.0 and stage not in self.snapshots:
+                self.snapshot(stage)
+            if inner is not None:
+                inner(stage, fraction, message)
+        return callback
+
+    def stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+        self.elapsed = time.perf_counter() - self._started
+        self._stop.set()
+        self._sampler.join()
+        try:
+            self.snapshot("end")
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            _active.release()
+
+        collapsed_path = f"{self.prefix}.collapsed"
+        with open(collapsed_path, "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        self.paths.insert(0, collapsed_path)
+        if self._profile is not None:
+            pstats_path = f"{self.prefix}.pstats"
+            self._profile.dump_stats(pstats_path)
+            self.paths.insert(1, pstats_path)
+        self.summary = self.report()
+        return self.summary
+
+    def report(self):
+        """Top-N hot functions and allocation sites of the finished run, as printable text."""
+        total = sum(self.stacks.values())
+        lines = [f"Profile of {self.name}: {self.elapsed:.2f}s wall, {total} samples, "
+                 f"peak traced memory {self.peak_memory / (1024 * 1024):.1f} MB"]
+        lines += [f"  {path}" for path in self.paths]
+
+        if self._profile is not None:
+            stats = pstats.Stats(self._profile).stats
+            lines.append(f"Top {self.top_n} functions by own time (cProfile, profiled thread):")
+            lines.append(f"  {'own s':>8} {'cum s':>8} {'calls':>9}  function")
+            hottest = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top_n]
+            for (file_name, line, function), (_, calls, own, cumulative, _) in hottest:
+                lines.append(f"  {own:8.3f} {cumulative:8.3f} {calls:9d}  {os.path.basename(file_name)}:{line}({function})")
+
+        own_samples = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            if len(frames) > 1:
+                own_samples[frames[-1]] += count
+        lines.append(f"Top {self.top_n} functions by own samples (all run threads, wall clock):")
+        for frame, count in own_samples.most_common(self.top_n):
+            lines.append(f"  {100 * count / total:6.1f}% {count * self.interval:8.2f}s  {frame}")
+
+        label, snapshot = max(self.snapshots.items(), key=lambda item: sum(trace.size for trace in item[1].traces))
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)])
+        lines.append(f"Top {self.top_n} allocation sites still live after '{label}' (the largest snapshot):")
+        for stat in snapshot.statistics("lineno")[:self.top_n]:
+            frame = stat.traceback[0]
+            lines.append(f"  {stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {os.path.basename(frame.filename)}:{frame.lineno}")
+        return "\n".join(lines)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        print(self.stop())
@@ -0,0 +1,158 @@
+import threading
+import time
+import re
+from urllib.parse import parse_qs, urlparse
+import requests
+
+DEFAULT_LIMITS = {
+    "rate": 10.0,             # requests per second refilled into the token bucket
+    "burst": 10,              # token bucket capacity
+    "min_rate": 0.5,
+    "max_rate": 50.0,
+    "concurrency": 4,         # starting number of in-flight requests
+    "min_concurrency": 1,
+    "max_concurrency": 16,
+    "latency_factor": 3.0,    # a response this many times slower than the running average of its request class counts as a spike
+    "max_retries": 5,
+}
+THROTTLE_STATUSES = (429, 503)
+
+class AdaptiveLimiter:
+    """Token bucket plus AIMD concurrency window for one host.
+
+    Healthy responses grow the window and the rate additively (about +1 per
+    window of requests); 429/503 responses, failed requests (connection
+    errors, timeouts) or latency spikes shrink both multiplicatively. Retry-After is honoured by pausing the whole host.
+    Latency is averaged per request class (see request_class()), so a slow
+    100-issue page is only compared with other pages, never with count calls.
+    """
+
+    def __init__(self, host, **limits):
+        self.host = host
+        self._apply({**DEFAULT_LIMITS, **limits})
+        self.tokens = float(self.burst)
+        self.in_flight = 0
+        self.avg_latency = {}
+        self.paused_until = 0.0
+        self.session = requests.Session()
+        self._refilled_at = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _apply(self, settings):
+        self.settings = settings
+        self.rate = float(settings["rate"])
+        self.burst = settings["burst"]
+        self.min_rate = settings["min_rate"]
+        self.max_rate = settings["max_rate"]
+        self.concurrency = float(settings["concurrency"])
+        self.min_concurrency = settings["min_concurrency"]
+        self.max_concurrency = settings["max_concurrency"]
+        self.latency_factor = settings["latency_factor"]
+        self.max_retries = settings["max_retries"]
+        # Starting values outside the configured bounds (e.g. only max_concurrency lowered) start at the bound.
+        self.rate = min(max(self.rate, self.min_rate), self.max_rate)
+        self.concurrency = min(max(self.concurrency, self.min_concurrency), self.max_concurrency)
+
+    def configure(self, **limits):
+        """Apply changed limits to a limiter in use; the rate and window restart from the new starting values."""
+        with self._cond:
+            settings = {**self.settings, **limits}
+            if settings == self.settings:
+                return
+            self._apply(settings)
+            self.tokens = min(self.tokens, self.burst)
+            self._cond.notify_all()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.in_flight < int(self.concurrency) and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                waits = [max(self.paused_until - now, 0), (1 - self.tokens) / self.rate if self.tokens < 1 else 0]
+                self._cond.wait(timeout=max(max(waits), 0.01) if self.in_flight < int(self.concurrency) else None)
+
+    def release(self, status_code, latency, retry_after=None, kind=None):
+        with self._cond:
+            self.in_flight -= 1
+            before = int(self.concurrency), self.rate
+            if status_code is None:
+                # The request raised (connection error, timeout): congestion, not a healthy sample.
+                self._decrease(0.5)
+                reason = "request failed"
+            elif status_code in THROTTLE_STATUSES:
+                self._decrease(0.5)
+                if retry_after:
+                    self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+                reason = f"HTTP {status_code}"
+            elif kind in self.avg_latency and latency > self.latency_factor * self.avg_latency[kind]:
+                self._decrease(0.75)
+                reason = f"latency spike {latency:.2f}s (avg {self.avg_latency[kind]:.2f}s for {kind})"
+            else:
+                self.rate = min(self.max_rate, self.rate + 1 / self.concurrency)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+                reason = "healthy"
+            if status_code is not None and status_code not in THROTTLE_STATUSES:
+                average = self.avg_latency.get(kind)
+                self.avg_latency[kind] = latency if average is None else 0.8 * average + 0.2 * latency
+            if int(self.concurrency) != before[0] or reason != "healthy" and self.rate != before[1]:
+                print(f"[rate-limit] {self.host}: concurrency {before[0]} -> {int(self.concurrency)}, "
+                      f"rate {before[1]:.1f} -> {self.rate:.1f} req/s ({reason})")
+            self._cond.notify_all()
+
+    def _decrease(self, factor):
+        self.concurrency = max(self.min_concurrency, self.concurrency * factor)
+        self.rate = max(self.min_rate, self.rate * factor)
+
+_limiters = {}
+_registry_lock = threading.Lock()
+
+def limiter_for(url, **limits):
+    """The shared limiter of a URL's host; `limits` also reconfigure it if it already exists."""
+    host = urlparse(url).netloc
+    with _registry_lock:
+        if host not in _limiters:
+            _limiters[host] = AdaptiveLimiter(host, **limits)
+        elif limits:
+            _limiters[host].configure(**limits)
+        return _limiters[host]
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+def request_class(method, url):
+    """Requests with comparable latency: same method, path (numeric ids collapsed) and page size."""
+    parsed = urlparse(url)
+    path = re.sub(r"/\d{3,}(?=/|$)", "/{id}", parsed.path)
+    page_size = parse_qs(parsed.query).get("maxResults")
+    return f"{method} {path}" + (f" maxResults={page_size[0]}" if page_size else "")
+
+def request(method, url, **kwargs):
+    """requests.request() routed through the host's adaptive limiter, retrying throttled responses."""
+    limiter = limiter_for(url)
+    kind = request_class(method, url)
+    for attempt in range(limiter.max_retries + 1):
+        limiter.acquire()
+        started = time.monotonic()
+        response = None
+        try:
+            response = limiter.session.request(method, url, **kwargs)
+        finally:
+            status_code = response.status_code if response is not None else None
+            retry_after = _retry_after(response) if response is not None else None
+            limiter.release(status_code, time.monotonic() - started, retry_after, kind)
+        if response.status_code not in THROTTLE_STATUSES or attempt == limiter.max_retries:
+            return response
+        if retry_after is None:
+            time.sleep(min(2 ** attempt, 30))
+    return response
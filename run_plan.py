@@ -0,0 +1,241 @@
+import json
+import os
+import threading
+from checkpoint import config_hash
+from exporters.confluence_exporter import export_to_confluence
+from exporters.file_exporter import export_to_file
+from formatters.html_formatter import format_html
+from formatters.issue_index import SORT_ORDERS
+from formatters.json_formatter import format_json
+from formatters.markdown_formatter import format_markdown
+from rate_limiter import DEFAULT_LIMITS, limiter_for
+from summarizers.huggingface_summarizer import HuggingFaceSummarizer
+from summarizers.ollama_summarizer import OllamaSummarizer
+from summarizers.onnx_summarizer import OnnxSummarizer
+from summarizers.openai_summarizer import OpenAISummarizer
+
+FORMATTERS = {
+    "markdown": format_markdown,
+    "json": format_json,
+    "html": format_html
+}
+FORMAT_EXTENSIONS = {"markdown": ".md", "json": ".json", "html": ".html"}
+SUMMARY_MODES = ("sequential", "parallel", "batched")
+DEFAULT_PROJECT = "CICD"
+ISSUE_TYPES = "issuetype IN (\"Story\", \"New Functionality\", \"Improvement\", \"Task\", \"Bug\")"
+REQUIRED_CONFLUENCE = ["url", "username", "api_token", "space_key", "page_title"]
+
+def _openai(settings):
+    if "openai_api_key" not in settings:
+        raise Exception("Missing 'openai_api_key' for OpenAI summarizer")
+    return OpenAISummarizer(settings["openai_api_key"])
+
+# Per summarizer type: how to build it, the settings that identify an instance,
+# the settings that change the summary text (part of the summary cache scope),
+# and the extra arguments its summarize()/summarize_batch() take for a version.
+SUMMARIZERS = {
+    "huggingface": {
+        "build": lambda settings: HuggingFaceSummarizer(),
+        "keys": [],
+        "summary_settings": lambda settings: {},
+        "kwargs": lambda version: {},
+    },
+    "onnx": {
+        "build": lambda settings: OnnxSummarizer(cache_dir=settings.get("onnx_cache_dir", "output/.onnx_cache"),
+                                                 quantize=settings.get("quantize", True)),
+        "keys": ["onnx_cache_dir", "quantize"],
+        "summary_settings": lambda settings: {"quantize": settings.get("quantize", True)},
+        "kwargs": lambda version: {},
+    },
+    "openai": {
+        "build": _openai,
+        "keys": ["openai_api_key"],
+        "summary_settings": lambda settings: {},
+        "kwargs": lambda version: {"max_words": 200},
+    },
+    "ollama": {
+        "build": lambda settings: OllamaSummarizer(**settings.get("ollama", {})),
+        "keys": ["ollama"],
+        "summary_settings": lambda settings: {
+            "model": (settings.get("ollama") or {}).get("model", "llama3.1"),
+            "num_ctx": (settings.get("ollama") or {}).get("num_ctx"),
+            "num_predict": (settings.get("ollama") or {}).get("num_predict"),
+        },
+        "kwargs": lambda version: {"version_name": version},
+    },
+}
+EXTRACTIVE_SUMMARIZERS = ("huggingface", "onnx")
+
+_summarizers = {}
+_summarizers_lock = threading.Lock()
+
+def file_path_for_format(file_path, fmt, version, multiple):
+    """Resolve the output path for one format; several formats get distinct extensions."""
+    path = file_path.replace("{version}", version).replace("{format}", fmt)
+    if multiple and "{format}" not in file_path:
+        path = os.path.splitext(path)[0] + FORMAT_EXTENSIONS[fmt]
+    return path
+
+def _number(value, name, minimum, maximum=None, integer=False, positive=False):
+    """A numeric setting checked against its type and range; `positive` excludes the minimum itself."""
+    kinds = int if integer else (int, float)
+    if (isinstance(value, bool) or not isinstance(value, kinds) or value < minimum or (positive and value == minimum)
+            or (maximum is not None and value > maximum)):
+        expected = "an integer" if integer else "a number"
+        bounds = f"{'>' if positive else '>='} {minimum}" if maximum is None else f"between {minimum} and {maximum}"
+        raise Exception(f"'{name}' must be {expected} {bounds}, got {value!r}")
+    return value
+
+def _http_limits(http):
+    """The validated `http` section over DEFAULT_LIMITS: known keys, positive rates and whole request counts."""
+    unknown = [key for key in http if key not in DEFAULT_LIMITS]
+    if unknown:
+        raise Exception(f"Unsupported 'http' settings: {', '.join(unknown)}. Choose from {', '.join(DEFAULT_LIMITS)}")
+    for key, value in http.items():
+        if key in ("concurrency", "min_concurrency", "max_concurrency", "burst"):
+            _number(value, f"http.{key}", 1, integer=True)
+        elif key == "max_retries":
+            _number(value, f"http.{key}", 0, integer=True)
+        elif key == "latency_factor":
+            _number(value, f"http.{key}", 1, positive=True)
+        else:
+            _number(value, f"http.{key}", 0, positive=True)
+    limits = {**DEFAULT_LIMITS, **http}
+    for low, high in (("min_rate", "max_rate"), ("min_concurrency", "max_concurrency")):
+        if limits[low] > limits[high]:
+            raise Exception(f"'http.{low}' ({limits[low]}) is above 'http.{high}' ({limits[high]})")
+    return limits
+
+class RunPlan:
+    """A config validated and resolved once, reusable for any number of runs.
+
+    Holds the Jira connection and JQL template, the summarizer backend and its
+    call convention, the resolved formatters and output sinks, and the
+    per-host HTTP limiters. Only the version and JQL vary between runs
+    (see run_config()); summarizer instances are shared process-wide by every
+    plan with the same summarizer settings, so models load once per process.
+    """
+
+    def __init__(self, cfg):
+        if not cfg:
+            raise Exception("Config is empty")
+        if "jira" not in cfg or not all(k in cfg["jira"] for k in ["url", "username", "password"]):
+            raise Exception("Missing required 'jira' config fields: url, username, password")
+        if "summarizer" not in cfg or "type" not in cfg["summarizer"]:
+            raise Exception("Missing 'summarizer' or 'type' in config")
+        if "output" not in cfg:
+            raise Exception("Missing 'output' in config")
+        self.cfg = cfg
+
+        jira = cfg["jira"]
+        self.jira_url = jira["url"]
+        self.auth = (jira["username"], jira["password"])
+        self.jql = jira.get("jql") or None
+        self.shard_size = _number(jira.get("shard_size", 1000), "jira.shard_size", 1, integer=True)
+        self.fetch_workers = _number(jira.get("max_workers", 8), "jira.max_workers", 1, integer=True)
+        self.version = cfg.get("version")
+
+        settings = cfg["summarizer"]
+        self.summarizer_type = settings["type"]
+        if self.summarizer_type not in SUMMARIZERS:
+            raise Exception(f"Unsupported summarizer: {self.summarizer_type}")
+        self.backend = SUMMARIZERS[self.summarizer_type]
+        self.summary_mode = settings.get("mode", "sequential")
+        if self.summary_mode not in SUMMARY_MODES:
+            raise Exception(f"Unsupported summarizer mode: {self.summary_mode}")
+        self.summary_workers = _number(settings.get("max_workers", 4), "summarizer.max_workers", 1, integer=True)
+        self.dedup = settings.get("dedup", True)
+        self.dedup_threshold = _number(settings.get("dedup_threshold", 0.6), "summarizer.dedup_threshold", 0, 1)
+        self.reuse = settings.get("reuse", True)
+        self.merge_max_fraction = _number(settings.get("merge_max_fraction", 0.5), "summarizer.merge_max_fraction", 0, 1)
+        self.condense_words = _number(settings.get("condense_words", 150), "summarizer.condense_words", 1, integer=True)
+        self.cache_path = settings.get("cache_path", "output/.cache/summaries.json")
+        self.extractive = self.summarizer_type in EXTRACTIVE_SUMMARIZERS
+        self._summarizer_key = (self.summarizer_type, json.dumps({k: settings.get(k) for k in self.backend["keys"]},
+                                                                 sort_keys=True, default=str))
+        # Cached summaries are only reused for the same backend output settings and prompt shaping.
+        self._summary_identity = config_hash({
+            "backend": self.backend["summary_settings"](settings),
+            "dedup_threshold": self.dedup_threshold if self.dedup else None,
+            "mode": self.summary_mode,
+        })
+
+        output = cfg["output"]
+        self.formats = output.get("formats") or [output.get("format", "markdown")]
+        unsupported = [fmt for fmt in self.formats if fmt not in FORMATTERS]
+        if unsupported:
+            raise Exception(f"Unsupported format: {', '.join(unsupported)}")
+        self.order = output.get("sort") or None
+        if self.order is not None and self.order not in SORT_ORDERS:
+            raise Exception(f"Unsupported sort order: {self.order}. Choose from {', '.join(SORT_ORDERS)}")
+        top_n = output.get("top_n")
+        if top_n is not None:
+            _number(top_n, "output.top_n", 0, integer=True)
+        self.top_n = top_n or None
+        self.snapshot_dir = output.get("snapshot_dir", "output/snapshots")
+        self.output_types = output.get("type", [])
+        self.file_path = output.get("file_path")
+        if "file" in self.output_types and not self.file_path:
+            raise Exception("Missing 'file_path' in output config for file output")
+        if "confluence" in self.output_types:
+            missing = [key for key in REQUIRED_CONFLUENCE if key not in (output.get("confluence") or {})]
+            if missing:
+                raise Exception(f"Missing 'output.confluence' config fields: {', '.join(missing)}")
+        # Confluence pages are converted from the Markdown rendering, whichever formats are listed.
+        rendered = self.formats + ["markdown"] if "confluence" in self.output_types else self.formats
+        self.formatters = {fmt: FORMATTERS[fmt] for fmt in rendered}
+
+        # Limiters are shared per host across plans; this plan's limits apply to its own hosts only.
+        limits = _http_limits(cfg.get("http") or {})
+        self.http = {"jira": limiter_for(self.jira_url, **limits)}
+        if "confluence" in self.output_types:
+            self.http["confluence"] = limiter_for(output["confluence"]["url"], **limits)
+
+    def run_config(self, version, jql=None):
+        """The concrete config of one run: the plan's config with this run's version and JQL."""
+        cfg = dict(self.cfg, version=version)
+        if jql:
+            cfg["jira"] = dict(self.cfg["jira"], jql=jql)
+        return cfg
+
+    def queries(self, version, jql=None):
+        """(JQL to fetch, broader fallback JQL) for a version; "{version}" in a custom JQL is filled in."""
+        jql = jql or self.jql
+        if jql:
+            primary = jql.replace("{version}", version)
+        else:
+            primary = f"project = {DEFAULT_PROJECT} AND fixVersion = \"{version}\" AND {ISSUE_TYPES}"
+        return primary, f"project = {DEFAULT_PROJECT} AND {ISSUE_TYPES}"
+
+    def cache_scope(self, version):
+        """SummaryCache scope of a version: summaries from other models or prompt settings never match."""
+        return f"{self.summarizer_type}|{self._summary_identity}|{version}"
+
+    def summarizer(self):
+        """The process-wide summarizer instance for this plan's settings, built on first use."""
+        with _summarizers_lock:
+            if self._summarizer_key not in _summarizers:
+                try:
+                    _summarizers[self._summarizer_key] = self.backend["build"](self.cfg["summarizer"])
+                except Exception as e:
+                    raise Exception(f"Failed to initialize summarizer: {str(e)}")
+            return _summarizers[self._summarizer_key]
+
+    def summarize(self, summarizer, text, version):
+        return summarizer.summarize(text, **self.backend["kwargs"](version))
+
+    def summarize_batch(self, summarizer, texts, version):
+        return summarizer.summarize_batch(texts, **self.backend["kwargs"](version))
+
+    def sinks(self, version, render):
+        """{sink name: zero-argument callable} for every configured output; `render(fmt)` returns a document."""
+        sinks = {}
+        if "file" in self.output_types:
+            for fmt in self.formats:
+                file_path = file_path_for_format(self.file_path, fmt, version, len(self.formats) > 1)
+                # No shared fallback file: concurrent sinks would overwrite it, a failure must reach the dispatcher.
+                sinks[f"file:{fmt}"] = lambda fmt=fmt, file_path=file_path: export_to_file(render(fmt), file_path, fallback_path=None)
+        if "confluence" in self.output_types:
+            run_cfg = self.run_config(version)
+            sinks["confluence"] = lambda: export_to_confluence(render("markdown"), run_cfg)
+        return sinks
@@ -0,0 +1,140 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from formatters.issue_index import IssueIndex
+
+MAGIC = b"RNSNAP01"
+PREAMBLE = struct.Struct("<8sI")  # magic, header length
+ALIGNMENT = 8
+STRING_COLUMNS = ("key", "summary")
+CODED_COLUMNS = ("issuetype", "priority", "status")
+
+def _pad(length):
+    return (-length) % ALIGNMENT
+
+def write_snapshot(path, version, summaries, index):
+    """Write the fetched release as a columnar snapshot.
+
+    Layout: preamble, JSON header (version, summaries, dictionaries, section
+    offsets), then 8-byte aligned sections: uint32 offset arrays into the
+    string blob for key/summary, uint16 dictionary codes for
+    issuetype/priority/status, and the UTF-8 string blob itself.
+    """
+    records = index.records
+    blob = bytearray()
+    sections = {}
+    for column in STRING_COLUMNS:
+        offsets = array("I", [0] * (len(records) + 1))
+        for i, record in enumerate(records):
+            offsets[i] = len(blob)
+            blob += record[column].encode("utf-8")
+        offsets[len(records)] = len(blob)
+        sections[f"{column}_offsets"] = offsets.tobytes()
+
+    dictionaries = {}
+    for column in CODED_COLUMNS:
+        values = {}
+        codes = array("H", (values.setdefault(record[column], len(values)) for record in records))
+        dictionaries[column] = list(values)
+        sections[column] = codes.tobytes()
+    sections["blob"] = bytes(blob)
+
+    layout, position = {}, 0
+    for name, data in sections.items():
+        layout[name] = [position, len(data)]
+        position += len(data) + _pad(len(data))
+    header = json.dumps({
+        "version": version,
+        "summaries": summaries,
+        "rows": len(records),
+        "dictionaries": dictionaries,
+        "sections": layout,
+    }).encode("utf-8")
+    header += b" " * _pad(PREAMBLE.size + len(header))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, len(header)))
+        f.write(header)
+        for data in sections.values():
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+    os.replace(tmp_path, path)
+    return path
+
+class Snapshot:
+    """Memory-mapped, read-only view of a snapshot written by write_snapshot().
+
+    Columns are typed memoryviews straight over the mapping; strings are only
+    decoded when a row is read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a release notes snapshot")
+        header = json.loads(bytes(self._mmap[PREAMBLE.size:PREAMBLE.size + header_length]))
+        self.version = header["version"]
+        self.summaries = header["summaries"]
+        self.rows = header["rows"]
+        self.dictionaries = header["dictionaries"]
+
+        data_start = PREAMBLE.size + header_length
+        self._views = [memoryview(self._mmap)]
+        self._sections = {}
+        for name, (offset, length) in header["sections"].items():
+            section = self._views[0][data_start + offset:data_start + offset + length]
+            self._views.append(section)
+            if name.endswith("_offsets"):
+                section = section.cast("I")
+                self._views.append(section)
+            elif name in CODED_COLUMNS:
+                section = section.cast("H")
+                self._views.append(section)
+            self._sections[name] = section
+
+    def __len__(self):
+        return self.rows
+
+    def string(self, column, i):
+        offsets = self._sections[f"{column}_offsets"]
+        return str(self._sections["blob"][offsets[i]:offsets[i + 1]], "utf-8")
+
+    def coded(self, column, i):
+        return self.dictionaries[column][self._sections[column][i]]
+
+    def to_index(self):
+        """Build the IssueIndex the formatters render from (no raw Jira fields)."""
+        names = {column: self.dictionaries[column] for column in CODED_COLUMNS}
+        codes = {column: self._sections[column] for column in CODED_COLUMNS}
+        return IssueIndex([{
+            "key": self.string("key", i),
+            "issuetype": names["issuetype"][codes["issuetype"][i]],
+            "priority": names["priority"][codes["priority"][i]],
+            "status": names["status"][codes["status"][i]],
+            "summary": self.string("summary", i),
+            "position": i,
+            "fields": {},
+        } for i in range(self.rows)])
+
+    def close(self):
+        # Views over the mapping must be released before it can be closed.
+        self._sections.clear()
+        for view in reversed(self._views):
+            view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def snapshot_path(version, directory="output/snapshots"):
+    return os.path.join(directory, f"{version}.rns")
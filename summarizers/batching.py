@@ -0,0 +1,33 @@
+import json
+import re
+
+CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+def batch_prompt(texts, instructions):
+    """One prompt covering every category; `texts` maps category name to its issue text."""
+    sections = "\n\n".join(f"### {category}\n{text}" for category, text in texts.items())
+    return (f"{instructions}\n\n"
+            f"Respond with a single JSON object whose keys are exactly these category names: {json.dumps(list(texts))}. "
+            f"Each value must be the summary for that category as a plain string. Do not add any other text.\n\n"
+            f"{sections}")
+
+def parse_batch(content, categories):
+    """Validated {category: summary} from a batched response.
+
+    Categories that are missing, empty or not strings are left out so the
+    caller can summarize them separately; unparseable output yields {}.
+    """
+    content = CODE_FENCE_RE.sub("", content.strip())
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        match = JSON_OBJECT_RE.search(content)
+        try:
+            data = json.loads(match.group(0)) if match else None
+        except json.JSONDecodeError:
+            data = None
+    if not isinstance(data, dict):
+        return {}
+    return {category: data[category].strip() for category in categories
+            if isinstance(data.get(category), str) and data[category].strip()}
@@ -1,16 +1,108 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from summarizers.batching import batch_prompt, parse_batch
+
+DEFAULT_HOST = "http://host.docker.internal:11434"
 
 class OllamaSummarizer:
-    def __init__(self, url="http://host.docker.internal:11434/api/generate"):
-        self.url = url
+    """Ollama backend that keeps its model loaded for the whole run.
 
-    def summarize(self, text, version_name):
+    Every host gets the model preloaded on construction, and every request
+    repeats `keep_alive` so Ollama never unloads it between categories.
+    `num_ctx` is sent unchanged with each request (and the preload), because a
+    different context size makes Ollama reload the model; `num_predict` is the
+    output budget per summary. Requests share one pooled session and go to the
+    host with the fewest requests in flight.
+    """
+
+    def __init__(self, hosts=None, model="llama3.1", keep_alive="30m", num_ctx=None, num_predict=None, timeout=300, preload=True):
+        hosts = hosts or [DEFAULT_HOST]
+        if isinstance(hosts, str):
+            hosts = [hosts]
+        # Accept full endpoint URLs as well, e.g. the old http://host:11434/api/generate default.
+        self.hosts = [host.rstrip("/").removesuffix("/api/generate") for host in hosts]
+        self.model = model
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.num_predict = num_predict
+        self.timeout = timeout
+        self.in_flight = {host: 0 for host in self.hosts}
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.hosts), pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if preload:
+            self.preload()
+
+    def _options(self, num_predict=None):
+        options = {}
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
+        if num_predict:
+            options["num_predict"] = num_predict
+        return options
+
+    def preload(self):
+        """Load the model on every host; a host that cannot load it is dropped, none at all is an error."""
+        def load(host):
+            # A generate request without a prompt only loads the model.
+            response = self.session.post(f"{host}/api/generate", json={
+                "model": self.model, "keep_alive": self.keep_alive, "options": self._options()
+            }, timeout=self.timeout)
+            response.raise_for_status()
+
+        with ThreadPoolExecutor(max_workers=len(self.hosts), thread_name_prefix="ollama-preload") as pool:
+            futures = {host: pool.submit(load, host) for host in self.hosts}
+        errors = {}
+        for host, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                errors[host] = e
+                print(f"⚠️ Could not load '{self.model}' on {host}: {str(e)}")
+        if len(errors) == len(self.hosts):
+            raise Exception(f"No Ollama host could load '{self.model}': " + "; ".join(f"{host}: {str(e)}" for host, e in errors.items()))
+        for host in errors:
+            self.hosts.remove(host)
+            del self.in_flight[host]
+        print(f"✅ Ollama model '{self.model}' loaded on {', '.join(self.hosts)} (keep_alive {self.keep_alive})")
+
+    def _acquire(self):
+        with self._lock:
+            host = min(self.hosts, key=lambda h: self.in_flight[h])
+            self.in_flight[host] += 1
+            return host
+
+    def _release(self, host):
+        with self._lock:
+            self.in_flight[host] -= 1
+
+    def _generate(self, prompt, num_predict=None, **extra):
         payload = {
-            "model": "llama3.1",
-            "prompt": f"Write a release notes summary for the following issues in '{version_name}'. Keep it concise and professional. Summarize in under 200 words.\n\n{text}",
-            "stream": False
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": self._options(num_predict or self.num_predict),
+            **extra
         }
-        headers = {"Content-Type": "application/json"}
-        response = requests.post(self.url, headers=headers, json=payload)
+        host = self._acquire()
+        try:
+            response = self.session.post(f"{host}/api/generate", json=payload, timeout=self.timeout)
+        finally:
+            self._release(host)
         response.raise_for_status()
-        return response.json().get("response", "Summarization failed")
\ No newline at end of file
+        return response.json().get("response", "Summarization failed")
+
+    def summarize(self, text, version_name):
+        return self._generate(f"Write a release notes summary for the following issues in '{version_name}'. Keep it concise and professional. Summarize in under 200 words.\n\n{text}")
+
+    def summarize_batch(self, texts, version_name):
+        """Summarize several categories in one request; returns only the categories that came back valid."""
+        prompt = batch_prompt(texts, f"Write a release notes summary for each category of issues below in '{version_name}'. "
+                                     f"Keep each one concise and professional, in under 200 words.")
+        num_predict = self.num_predict * len(texts) if self.num_predict else None
+        return parse_batch(self._generate(prompt, num_predict=num_predict, format="json"), texts)
@@ -0,0 +1,66 @@
+import json
+import os
+import platform
+import shutil
+from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+from transformers import AutoTokenizer, pipeline
+from summarizers.huggingface_summarizer import HuggingFaceSummarizer
+
+EXPORT_MARKER = "export.json"
+
+def _quantization_config():
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    return AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+
+def _write_marker(export_dir, model, quantized):
+    with open(os.path.join(export_dir, EXPORT_MARKER), "w") as f:
+        json.dump({"model": model, "quantized": quantized}, f)
+
+def export_model(model, cache_dir, quantize=True):
+    """Export the model to ONNX (and int8 if requested) once; later calls reuse the cached files."""
+    model_dir = os.path.join(cache_dir, model.replace("/", "--"))
+    fp32_dir = os.path.join(model_dir, "fp32")
+    int8_dir = os.path.join(model_dir, "int8")
+
+    if not os.path.exists(os.path.join(fp32_dir, EXPORT_MARKER)):
+        print(f"Exporting {model} to ONNX in {fp32_dir}, this only happens once...")
+        ort_model = ORTModelForSeq2SeqLM.from_pretrained(model, export=True)
+        ort_model.save_pretrained(fp32_dir)
+        AutoTokenizer.from_pretrained(model).save_pretrained(fp32_dir)
+        _write_marker(fp32_dir, model, False)
+    if not quantize:
+        return fp32_dir
+
+    if not os.path.exists(os.path.join(int8_dir, EXPORT_MARKER)):
+        print(f"Quantizing {model} to int8 in {int8_dir}, this only happens once...")
+        qconfig = _quantization_config()
+        for file_name in sorted(f for f in os.listdir(fp32_dir) if f.endswith(".onnx")):
+            quantizer = ORTQuantizer.from_pretrained(fp32_dir, file_name=file_name)
+            quantizer.quantize(save_dir=int8_dir, quantization_config=qconfig)
+        for file_name in os.listdir(fp32_dir):
+            if file_name.endswith(".json") and file_name != EXPORT_MARKER or file_name.endswith(".txt"):
+                shutil.copy(os.path.join(fp32_dir, file_name), int8_dir)
+        _write_marker(int8_dir, model, True)
+    return int8_dir
+
+def _onnx_file_names(export_dir):
+    suffix = "_quantized.onnx" if any(f.endswith("_quantized.onnx") for f in os.listdir(export_dir)) else ".onnx"
+    names = {"encoder_file_name": f"encoder_model{suffix}"}
+    if os.path.exists(os.path.join(export_dir, f"decoder_model_merged{suffix}")):
+        names["decoder_file_name"] = f"decoder_model_merged{suffix}"
+    else:
+        names["decoder_file_name"] = f"decoder_model{suffix}"
+        if os.path.exists(os.path.join(export_dir, f"decoder_with_past_model{suffix}")):
+            names["decoder_with_past_file_name"] = f"decoder_with_past_model{suffix}"
+    return names
+
+class OnnxSummarizer(HuggingFaceSummarizer):
+    """Same model family as HuggingFaceSummarizer, run through ONNX Runtime (int8 by default)."""
+
+    def __init__(self, model="sshleifer/distilbart-cnn-6-6", cache_dir="output/.onnx_cache", quantize=True):
+        export_dir = export_model(model, cache_dir, quantize)
+        ort_model = ORTModelForSeq2SeqLM.from_pretrained(export_dir, **_onnx_file_names(export_dir))
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        self.summarizer = pipeline("summarization", model=ort_model, tokenizer=tokenizer)
@@ -1,4 +1,7 @@
 from openai import OpenAI
+from summarizers.batching import batch_prompt, parse_batch
+
+SYSTEM_PROMPT = "You are a concise summarizer for release notes."
 
 class OpenAISummarizer:
     def __init__(self, api_key):
@@ -8,10 +11,25 @@ class OpenAISummarizer:
         response = self.client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
-                {"role": "system", "content": "You are a concise summarizer for release notes."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": f"Summarize the following text in under {max_words} words:\n\n{text}"}
             ],
             max_tokens=300,
             temperature=0.5
         )
-        return response.choices[0].message.content.strip()
\ No newline at end of file
+        return response.choices[0].message.content.strip()
+
+    def summarize_batch(self, texts, max_words=200):
+        """Summarize several categories in one request; returns only the categories that came back valid."""
+        prompt = batch_prompt(texts, f"Summarize the text of each category below in under {max_words} words.")
+        response = self.client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=300 * len(texts),
+            temperature=0.5,
+            response_format={"type": "json_object"}
+        )
+        return parse_batch(response.choices[0].message.content or "", texts)
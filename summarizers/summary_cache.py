@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import threading
+
+# Every SummaryCache of a process saves through this lock, so concurrent runs merge instead of racing.
+_save_lock = threading.Lock()
+
+class SummaryCache:
+    """Cross-run store of per-issue summaries and per-category summaries.
+
+    Issues are keyed by issue key plus Jira's `updated` timestamp, so an edited
+    ticket is treated as new; an issue entry is the model's summary of one long
+    issue. Each category summary remembers the issues it was built from, which
+    lets the next run reuse an unchanged category and rebuild a changed one
+    from the cached issue summaries plus only the new or changed issues.
+    """
+
+    def __init__(self, path="output/.cache/summaries.json"):
+        self.path = path
+        self._lock = threading.Lock()
+        data = self._read()
+        self.issues = data.get("issues", {})
+        self.categories = data.get("categories", {})
+        self._stored_issues = set()
+        self._stored_categories = set()
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def issue_id(issue):
+        return f"{issue['key']}@{issue['fields'].get('updated', '')}"
+
+    @staticmethod
+    def _key(scope, name):
+        return f"{scope}|{name}"
+
+    def issue_summary(self, scope, issue):
+        """Cached summary of one issue, or None."""
+        with self._lock:
+            return self.issues.get(self._key(scope, self.issue_id(issue)))
+
+    def store_issue(self, scope, issue, summary):
+        key = self._key(scope, self.issue_id(issue))
+        with self._lock:
+            self.issues[key] = summary
+            self._stored_issues.add(key)
+
+    def diff(self, scope, category, issue_list):
+        """Compare the issues of a category with those behind its cached summary.
+
+        Returns (previous summary or None, changed issues, removed issue keys);
+        changed issues are the ones that are new or whose `updated` moved.
+        """
+        with self._lock:
+            previous = self.categories.get(self._key(scope, category))
+        if previous is None:
+            return None, list(issue_list), []
+        members = set(previous["members"])
+        changed = [issue for issue in issue_list if self.issue_id(issue) not in members]
+        current_keys = {issue["key"] for issue in issue_list}
+        removed = sorted({member.split("@", 1)[0] for member in members} - current_keys)
+        return previous["summary"], changed, removed
+
+    def store(self, scope, category, issue_list, summary):
+        key = self._key(scope, category)
+        with self._lock:
+            self.categories[key] = {
+                "scope": scope,
+                "members": [self.issue_id(issue) for issue in issue_list],
+                "summary": summary,
+            }
+            self._stored_categories.add(key)
+
+    def save(self):
+        """Merge this instance's new entries into the file on disk and replace it atomically.
+
+        Entries written by other runs since this cache was loaded are kept;
+        issue summaries no category refers to any more are dropped.
+        """
+        with self._lock:
+            issues = {key: self.issues[key] for key in self._stored_issues}
+            categories = {key: self.categories[key] for key in self._stored_categories}
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with _save_lock:
+            data = self._read()
+            categories = {**data.get("categories", {}), **categories}
+            live = {self._key(entry.get("scope"), member) for entry in categories.values() for member in entry["members"]}
+            issues = {key: text for key, text in {**data.get("issues", {}), **issues}.items()
+                      if key in live or key in self._stored_issues}
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.path)}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"issues": issues, "categories": categories}, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
@@ -1,51 +1,49 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
 import streamlit as st
+import streamlit.components.v1 as components
 import yaml
+from checkpoint import config_hash
+from profiling import RunProfiler, profiling_active
+from run_plan import FORMAT_EXTENSIONS, FORMATTERS, RunPlan
 from cli import generate_release_notes
 
+STAGES = {"fetch": "Fetch issues", "summarize": "Summarize", "outputs": "Publish outputs"}
+PREVIEW_FORMATS = ["markdown", "html", "json"]
+
+@st.cache_data(show_spinner=False)
+def read_config(config_path, mtime):
+    """Parsed config.yaml, cached until the file's mtime changes."""
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+@st.cache_resource(show_spinner=False)
+def compile_plan(plan_key, _cfg):
+    """One RunPlan per distinct settings, validated and resolved once per process."""
+    return RunPlan(_cfg)
+
+def plan_for(cfg):
+    """The cached plan for a config; version and JQL are per run, so they are not part of the plan."""
+    base = {key: value for key, value in cfg.items() if key != "version"}
+    base["jira"] = {key: value for key, value in (cfg.get("jira") or {}).items() if key != "jql"}
+    return compile_plan(json.dumps(base, sort_keys=True, default=str), base)
+
 def load_config(config_path="config.yaml"):
     """Load configuration from config.yaml and validate required fields."""
     try:
-        with open(config_path, "r") as f:
-            config = yaml.safe_load(f)
+        config = read_config(config_path, os.path.getmtime(config_path))
         if not config:
             st.error("config.yaml is empty. Please provide a valid configuration.")
             raise ValueError("Empty config file")
 
-        # Required top-level keys
-        required_keys = ["jira", "version", "summarizer", "output"]
-        missing = [key for key in required_keys if key not in config]
-        if missing:
-            st.error(f"Please add the following required keys to config.yaml and build the image again: {', '.join(missing)}")
-            raise ValueError(f"Missing required keys: {missing}")
-
-        # Required Jira fields
-        required_jira = ["url", "username", "password"]
-        missing_jira = [key for key in required_jira if key not in config["jira"]]
-        if missing_jira:
-            st.error(f"Please add the following keys to 'jira' in config.yaml and build the image again: {', '.join(missing_jira)}")
-            raise ValueError(f"Missing Jira keys: {missing_jira}")
-
-        # Required Summarizer fields
-        if "type" not in config["summarizer"]:
-            st.error("Please add 'type' to 'summarizer' in config.yaml and build the image again.")
-            raise ValueError("Missing summarizer type")
-
-        # Required Output fields
-        required_output = ["type"]
-        if "file" in config["output"]["type"]:
-            required_output.extend(["file_path", "format"])
-        missing_output = [key for key in required_output if key not in config["output"]]
-        if missing_output:
-            st.error(f"Please add the following keys to 'output' in config.yaml and build the image again: {', '.join(missing_output)}")
-            raise ValueError(f"Missing output keys: {missing_output}")
-
-        # Required Confluence fields if confluence is in output type
-        if "confluence" in config["output"]["type"]:
-            required_confluence = ["url", "username", "api_token", "space_key", "page_title"]
-            missing_confluence = [key for key in required_confluence if key not in config["output"]["confluence"]]
-            if missing_confluence:
-                st.error(f"Please add the following keys to 'output.confluence' in config.yaml and build the image again: {', '.join(missing_confluence)}")
-                raise ValueError(f"Missing confluence keys: {missing_confluence}")
+        try:
+            plan_for(config)
+        except Exception as e:
+            st.error(f"Invalid config.yaml: {str(e)}. Please fix config.yaml and build the image again.")
+            raise
 
         return config
     except FileNotFoundError:
@@ -68,15 +66,25 @@ def main():
     jira_url = st.text_input("Jira URL", value=cfg["jira"]["url"])
     jira_username = st.text_input("Jira Username", value=cfg["jira"]["username"])
     jira_password = st.text_input("Jira API Token", type="password", value=cfg["jira"]["password"])
-    version = st.text_input("Release Version", value=cfg["version"])
+    version = st.text_input("Release Version", value=cfg.get("version") or "")
     jql = st.text_input("Custom JQL (optional)", placeholder="e.g., project = CICD", value=cfg["jira"].get("jql", ""))
 
     st.subheader("Summarizer Selection")
-    summarizer = st.selectbox("Choose Summarizer", ["huggingface", "openai", "ollama"],
-                              index=["huggingface", "openai", "ollama"].index(cfg["summarizer"]["type"]))
+    summarizer = st.selectbox("Choose Summarizer", ["huggingface", "onnx", "openai", "ollama"],
+                              index=["huggingface", "onnx", "openai", "ollama"].index(cfg["summarizer"]["type"]))
     openai_api_key = ""
     if summarizer == "openai":
         openai_api_key = st.text_input("OpenAI API Key", type="password", value=cfg["summarizer"].get("openai_api_key", ""))
+    ollama_config = dict(cfg["summarizer"].get("ollama") or {})
+    if summarizer == "ollama":
+        hosts = ollama_config.get("hosts") or ["http://host.docker.internal:11434"]
+        hosts = st.text_input("Ollama Hosts (comma-separated)", value=", ".join([hosts] if isinstance(hosts, str) else hosts))
+        ollama_config["hosts"] = [host.strip() for host in hosts.split(",") if host.strip()]
+        ollama_config["model"] = st.text_input("Ollama Model", value=ollama_config.get("model", "llama3.1"))
+    summary_mode = cfg["summarizer"].get("mode", "sequential")
+    if summarizer in ("openai", "ollama"):
+        summary_mode = st.selectbox("Summarization Mode", ["sequential", "parallel", "batched"],
+                                    index=["sequential", "parallel", "batched"].index(summary_mode))
 
     st.subheader("Output Options")
     output_types = st.multiselect("Output Types", ["file", "confluence"], default=cfg["output"]["type"])
@@ -84,7 +92,7 @@ def main():
     file_path = None
     if "file" in output_types:
         file_format = st.selectbox("File Format", ["markdown", "json", "html"],
-                                   index=["markdown", "json", "html"].index(cfg["output"]["format"]))
+                                   index=["markdown", "json", "html"].index(cfg["output"].get("format") or (cfg["output"].get("formats") or ["markdown"])[0]))
         default_file_path = cfg["output"]["file_path"].format(version=version, format=file_format)
         file_path = st.text_input("File Path", value=default_file_path)
     confluence_config = {}
@@ -106,41 +114,130 @@ def main():
             "parent_page_id": parent_page_id if parent_page_id else None
         }
 
-    if st.button("Generate Release Notes"):
-        cfg = {
-            "jira": {
-                "url": jira_url,
-                "username": jira_username,
-                "password": jira_password,
-            },
-            "version": version,
-            "summarizer": {
-                "type": summarizer
-            },
-            "output": {
-                "type": output_types
-            }
+    resume = st.checkbox("Resume the last failed run with these settings", value=False)
+    force = st.checkbox("Regenerate even if these settings were already generated in this session", value=False)
+    profile = st.checkbox("Profile this run (cProfile + tracemalloc, written to output/profiles)", value=False)
+
+    cfg = {
+        "jira": {
+            "url": jira_url,
+            "username": jira_username,
+            "password": jira_password,
+        },
+        "version": version,
+        "summarizer": {
+            "type": summarizer,
+            "mode": summary_mode
+        },
+        "output": {
+            "type": output_types
         }
-        if jql:
-            cfg["jira"]["jql"] = jql
-        if summarizer == "openai" and openai_api_key:
-            cfg["summarizer"]["openai_api_key"] = openai_api_key
-        if "file" in output_types:
-            cfg["output"]["file_path"] = file_path
-            cfg["output"]["format"] = file_format
-        if "confluence" in output_types:
-            cfg["output"]["confluence"] = confluence_config
+    }
+    if jql:
+        cfg["jira"]["jql"] = jql
+    if summarizer == "openai" and openai_api_key:
+        cfg["summarizer"]["openai_api_key"] = openai_api_key
+    if summarizer == "ollama":
+        cfg["summarizer"]["ollama"] = ollama_config
+    if "file" in output_types:
+        cfg["output"]["file_path"] = file_path
+        cfg["output"]["format"] = file_format
+    if "confluence" in output_types:
+        cfg["output"]["confluence"] = confluence_config
+    run_key = config_hash(cfg)
+    artefacts = st.session_state.setdefault("artefacts", {})
+    job = st.session_state.get("job")
 
-        with st.spinner("Generating release notes..."):
+    if st.button("Generate Release Notes", disabled=job is not None):
+        if run_key in artefacts and not force and not resume and not profile:
+            st.info("These settings were already generated in this session; showing the cached result.")
+        else:
             try:
-                generate_release_notes(cfg)
-                st.success("Release notes generated successfully!")
-                if "file" in output_types:
-                    st.write(f"File saved to: {file_path}")
-                if "confluence" in output_types:
-                    st.write("Check Confluence for the published page.")
+                plan = plan_for(cfg)
             except Exception as e:
                 st.error(f"Error: {str(e)}")
+                st.stop()
+            if profile and profiling_active():
+                st.warning("Another session is running a profiled generation; only one run can be profiled at a time. "
+                           "Try again when it finishes, or untick profiling.")
+                st.stop()
+            job = start_job(plan, cfg, run_key, resume, profile)
+            st.session_state["job"] = job
+
+    if job is not None:
+        show_job(job, artefacts)
+    if run_key in artefacts:
+        show_preview(artefacts[run_key])
+    if st.session_state.get("profile"):
+        with st.expander("Profile of the last profiled run"):
+            st.code(st.session_state["profile"])
+
+def start_job(plan, cfg, run_key, resume, profile=False):
+    """Run generate_release_notes on a background thread; the script only polls the shared job dict."""
+    job = {"key": run_key, "cfg": cfg, "stages": {stage: (0.0, "Waiting") for stage in STAGES},
+           "result": None, "error": None, "profile": None, "done": False}
+
+    def progress(stage, fraction, message):
+        job["stages"][stage] = (fraction, message)
+
+    def run():
+        profiler = RunProfiler(cfg["version"]) if profile else None
+        try:
+            job["stages"]["summarize"] = (0.0, "Loading summarizer")
+            summarizer = plan.summarizer()
+            with profiler or nullcontext():
+                job["result"] = generate_release_notes(plan, resume=resume, summarizer=summarizer,
+                                                       progress=profiler.progress(progress) if profiler else progress,
+                                                       version=cfg["version"], jql=cfg["jira"].get("jql"))
+        except Exception as e:
+            job["error"] = e
+        finally:
+            if profiler is not None:
+                job["profile"] = profiler.summary
+            job["done"] = True
+
+    threading.Thread(target=run, name="release-notes-run", daemon=True).start()
+    return job
+
+def show_job(job, artefacts):
+    for stage, label in STAGES.items():
+        fraction, message = job["stages"][stage]
+        st.progress(min(max(fraction, 0.0), 1.0), text=f"{label}: {message}")
+    if not job["done"]:
+        time.sleep(0.5)
+        st.rerun()
+
+    del st.session_state["job"]
+    if job["profile"]:
+        st.session_state["profile"] = job["profile"]
+    if job["error"] is not None:
+        st.error(f"Error: {str(job['error'])}")
+    elif job["result"] is None:
+        st.warning("No issues found with either query.")
+    else:
+        artefacts[job["key"]] = dict(job["result"], documents={})
+        st.success("Release notes generated successfully!")
+        output_types = job["cfg"]["output"]["type"]
+        if "file" in output_types:
+            st.write(f"File saved to: {job['cfg']['output']['file_path']}")
+        if "confluence" in output_types:
+            st.write("Check Confluence for the published page.")
+
+def show_preview(artefact):
+    """Preview every format from the cached run; documents are rendered once per session."""
+    st.subheader(f"Preview - {artefact['version']}")
+    for tab, fmt in zip(st.tabs([fmt.upper() for fmt in PREVIEW_FORMATS]), PREVIEW_FORMATS):
+        if fmt not in artefact["documents"]:
+            artefact["documents"][fmt] = FORMATTERS[fmt](artefact["version"], artefact["categories"], artefact["summaries"], artefact["index"])
+        content = artefact["documents"][fmt]
+        with tab:
+            if fmt == "markdown":
+                st.markdown(content)
+            elif fmt == "html":
+                components.html(content, height=600, scrolling=True)
+            else:
+                st.code(content, language="json")
+            st.download_button(f"Download {fmt}", content, file_name=f"release_notes_{artefact['version']}{FORMAT_EXTENSIONS[fmt]}", key=f"download-{fmt}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file